@@ -1,7 +1,12 @@
-import time
-import schedule
 import asyncio
-from crypto_api import get_top_coins, get_multiple_prices, get_all_coins
+from html import escape
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Set
+
+from telegram.error import RetryAfter
+
+from crypto_api import get_top_coins, get_multiple_prices, get_all_coins, get_coin_by_id
 from user_storage import get_storage
 
 from config import ALERT_THRESHOLD
@@ -10,10 +15,84 @@ from config import ALERT_THRESHOLD
 storage = get_storage()
 
 # Load data from persistent storage on startup
-subscribers = storage.load_subscribers()
+# Subscribers are a set so membership checks and removal are O(1)
+subscribers: Set[int] = set(storage.load_subscribers())
 last_prices = storage.load_last_prices()
 user_alert_thresholds = storage.load_user_thresholds()
-user_coin_subscriptions = storage.load_user_coin_subscriptions()
+# Per-user coin subscriptions are sets too: add/remove/membership become
+# O(1) instead of scanning a list, and persistence serializes them sorted
+user_coin_subscriptions = {
+    user_id: set(coins)
+    for user_id, coins in storage.load_user_coin_subscriptions().items()
+}
+
+
+@dataclass
+class _DirtyFlags:
+    """Tracks which in-memory state still needs flushing to persistent storage"""
+    subscribers: bool = False
+    thresholds: Set[int] = field(default_factory=set)
+    coins: Set[int] = field(default_factory=set)
+    removed_users: Set[int] = field(default_factory=set)
+    last_prices: bool = False
+
+
+# Mutating helpers only mark state dirty; flush_dirty() batches the disk
+# writes at the end of each check cycle and on shutdown
+_dirty = _DirtyFlags()
+
+# Single-writer lock so concurrent flushes can't interleave their writes
+_IO_LOCK = asyncio.Lock()
+
+
+async def flush_dirty():
+    """Flush any dirty in-memory state to persistent storage"""
+    async with _IO_LOCK:
+        if _dirty.subscribers:
+            storage.save_subscribers(sorted(subscribers))
+            _dirty.subscribers = False
+
+        # Deletions go first so a user who unsubscribed and came back in
+        # the same cycle keeps the state saved below
+        for chat_id in _dirty.removed_users:
+            storage.delete_user_threshold(chat_id)
+            storage.delete_user_coin_subscriptions(chat_id)
+        _dirty.removed_users.clear()
+
+        for chat_id in _dirty.thresholds:
+            if chat_id in user_alert_thresholds:
+                storage.save_user_threshold(chat_id, user_alert_thresholds[chat_id])
+        _dirty.thresholds.clear()
+
+        for chat_id in _dirty.coins:
+            storage.save_user_coin_subscriptions(
+                chat_id, sorted(user_coin_subscriptions.get(chat_id, ())))
+        _dirty.coins.clear()
+
+        if _dirty.last_prices:
+            storage.save_last_prices(last_prices)
+            _dirty.last_prices = False
+
+
+async def _send_with_retry(bot, chat_id, message, max_attempts=3):
+    """Send an alert message, backing off when Telegram asks us to retry"""
+    for attempt in range(max_attempts):
+        try:
+            return await bot.send_message(chat_id=chat_id, text=message, parse_mode='HTML')
+        except RetryAfter as e:
+            if attempt == max_attempts - 1:
+                raise
+            await asyncio.sleep(e.retry_after)
+
+
+@lru_cache(maxsize=4096)
+def _format_price(price: float) -> str:
+    """Format a USD price for display, with more decimals for small values"""
+    if price < 0.01:
+        return f"${price:.6f}".rstrip('0').rstrip('.')
+    elif price < 1:
+        return f"${price:.4f}".rstrip('0').rstrip('.')
+    return f"${price:,.2f}"
 
 
 def get_user_monitored_coins(user_id):
@@ -22,28 +101,28 @@ def get_user_monitored_coins(user_id):
     Returns only user's personal coin subscriptions (no default top coins)
     """
     if user_id in user_coin_subscriptions and user_coin_subscriptions[user_id]:
-        return user_coin_subscriptions[user_id]
+        return sorted(user_coin_subscriptions[user_id])
     else:
         return []  # No coins to monitor if user hasn't added any
 
 
 def add_coin_to_user_subscription(user_id, coin_id):
     """Add a coin to user's personal subscription list"""
-    if user_id not in user_coin_subscriptions:
-        user_coin_subscriptions[user_id] = []
+    coins = user_coin_subscriptions.setdefault(user_id, set())
 
-    if coin_id not in user_coin_subscriptions[user_id]:
-        user_coin_subscriptions[user_id].append(coin_id)
-        storage.save_user_coin_subscriptions(user_id, user_coin_subscriptions[user_id])
+    if coin_id not in coins:
+        coins.add(coin_id)
+        _dirty.coins.add(user_id)
+        _dirty.removed_users.discard(user_id)
         return True
     return False
 
 
 def remove_coin_from_user_subscription(user_id, coin_id):
     """Remove a coin from user's personal subscription list"""
-    if user_id in user_coin_subscriptions and coin_id in user_coin_subscriptions[user_id]:
-        user_coin_subscriptions[user_id].remove(coin_id)
-        storage.save_user_coin_subscriptions(user_id, user_coin_subscriptions[user_id])
+    if coin_id in user_coin_subscriptions.get(user_id, ()):
+        user_coin_subscriptions[user_id].discard(coin_id)
+        _dirty.coins.add(user_id)
         return True
     return False
 
@@ -51,8 +130,8 @@ def remove_coin_from_user_subscription(user_id, coin_id):
 def clear_user_coin_subscriptions(user_id):
     """Clear all user's personal coin subscriptions"""
     if user_id in user_coin_subscriptions:
-        user_coin_subscriptions[user_id] = []
-        storage.save_user_coin_subscriptions(user_id, user_coin_subscriptions[user_id])
+        user_coin_subscriptions[user_id] = set()
+        _dirty.coins.add(user_id)
         return True
     return False
 
@@ -60,8 +139,11 @@ def clear_user_coin_subscriptions(user_id):
 def add_subscriber(chat_id):
     """Add a new subscriber"""
     if chat_id not in subscribers:
-        subscribers.append(chat_id)
-        storage.save_subscribers(subscribers)
+        subscribers.add(chat_id)
+        _dirty.subscribers = True
+        # If they unsubscribed earlier in this cycle, the pending delete
+        # must not wipe out whatever they save from here on
+        _dirty.removed_users.discard(chat_id)
         return True
     return False
 
@@ -69,16 +151,15 @@ def add_subscriber(chat_id):
 def remove_subscriber(chat_id):
     """Remove a subscriber"""
     if chat_id in subscribers:
-        subscribers.remove(chat_id)
+        subscribers.discard(chat_id)
         if chat_id in user_alert_thresholds:
             del user_alert_thresholds[chat_id]
         if chat_id in user_coin_subscriptions:
             del user_coin_subscriptions[chat_id]
-        storage.save_subscribers(subscribers)
-        for chat_id, threshold in user_alert_thresholds.items():
-            storage.save_user_threshold(chat_id, threshold)
-        for chat_id, coin_ids in user_coin_subscriptions.items():
-            storage.save_user_coin_subscriptions(chat_id, coin_ids)
+        _dirty.subscribers = True
+        _dirty.removed_users.add(chat_id)
+        _dirty.thresholds.discard(chat_id)
+        _dirty.coins.discard(chat_id)
         return True
     return False
 
@@ -86,7 +167,8 @@ def remove_subscriber(chat_id):
 def set_user_alert_threshold(chat_id, threshold):
     """Set alert threshold for a user"""
     user_alert_thresholds[chat_id] = threshold
-    storage.save_user_threshold(chat_id, threshold)
+    _dirty.thresholds.add(chat_id)
+    _dirty.removed_users.discard(chat_id)
     return True
 
 
@@ -128,9 +210,9 @@ def print_user_statistics():
     print(f"\n📋 DETAILED USER BREAKDOWN:")
     print("-" * 60)
 
-    for i, chat_id in enumerate(subscribers, 1):
+    for i, chat_id in enumerate(sorted(subscribers), 1):
         threshold = user_alert_thresholds.get(chat_id, ALERT_THRESHOLD)
-        user_coins = user_coin_subscriptions.get(chat_id, [])
+        user_coins = sorted(user_coin_subscriptions.get(chat_id, ()))
         coin_count = len(user_coins)
 
         print(f"{i:2d}. User {chat_id}")
@@ -145,23 +227,47 @@ async def check_prices(bot):
     """
     Check prices for monitored coins and send alerts for significant changes
     """
-    # Get all unique coins that need to be monitored from all subscribers
-    all_monitored_coins = set()
-
-    # Add coins for each subscriber
+    # Map each monitored coin to the subscribers watching it, built once
+    # per cycle instead of re-querying per (coin, subscriber) pair
+    coin_to_subs = {}
     for chat_id in subscribers:
-        user_coins = get_user_monitored_coins(chat_id)
-        all_monitored_coins.update(user_coins)
+        for coin_id in get_user_monitored_coins(chat_id):
+            coin_to_subs.setdefault(coin_id, []).append(chat_id)
 
-    monitored_coins = list(all_monitored_coins)
+    # Minimum threshold per coin: if a change doesn't reach anyone's
+    # threshold, the whole subscriber fan-out can be skipped
+    coin_min_threshold = {
+        coin_id: min(user_alert_thresholds.get(s, ALERT_THRESHOLD) for s in subs)
+        for coin_id, subs in coin_to_subs.items()
+    }
+
+    monitored_coins = list(coin_to_subs)
 
     if not monitored_coins:
         print("No personal coin subscriptions to monitor")
+        # Subscribe/threshold changes must still persist on cycles with
+        # nothing to monitor, or they'd only hit disk on clean shutdown
+        await flush_dirty()
         return
 
     # Get prices for all monitored coins at once (more efficient)
     current_prices = await get_multiple_prices(monitored_coins)
 
+    # Resolve coin names for all coins that could alert in one concurrent batch
+    # instead of awaiting get_coin_by_id inside the subscriber loop
+    def _could_alert(cid):
+        cur = current_prices.get(cid)
+        last = last_prices.get(cid)
+        if cur is None or not last:
+            return False
+        return abs((cur - last) / last) * 100 >= coin_min_threshold[cid]
+
+    alerting_coins = [cid for cid in monitored_coins if _could_alert(cid)]
+    coin_infos = dict(zip(alerting_coins,
+                          await asyncio.gather(*(get_coin_by_id(cid) for cid in alerting_coins))))
+
+    send_tasks = []
+
     for coin_id in monitored_coins:
         current_price = current_prices.get(coin_id)
         if current_price is None:
@@ -169,81 +275,55 @@ async def check_prices(bot):
 
         last_price = last_prices.get(coin_id)
         if last_price:
-            # Calculate percentage change
+            # Calculate percentage change once per coin
             change = abs((current_price - last_price) / last_price) * 100
 
-            # Send alerts only to subscribers who are monitoring this specific coin
-            for chat_id in subscribers:
-                user_coins = get_user_monitored_coins(chat_id)
-
-                # Only send alert if user is monitoring this specific coin
-                if coin_id in user_coins:
-                    # Get user's custom threshold or use default
-                    user_threshold = user_alert_thresholds.get(chat_id, ALERT_THRESHOLD)
-
-                    if change >= user_threshold:
-                        # Determine if price went up or down
-                        direction = "📈" if current_price > last_price else "📉"
-
-                        # Get coin name for better message
-                        from crypto_api import get_coin_by_id
-                        coin_info = await get_coin_by_id(coin_id)
-                        coin_name = coin_info['name'] if coin_info else coin_id
-
-                        # Format price properly
-                        if current_price < 0.01:
-                            price_display = f"${current_price:.6f}".rstrip('0').rstrip('.')
-                        elif current_price < 1:
-                            price_display = f"${current_price:.4f}".rstrip('0').rstrip('.')
-                        else:
-                            price_display = f"${current_price:,.2f}"
-
-                        if last_price < 0.01:
-                            last_price_display = f"${last_price:.6f}".rstrip('0').rstrip('.')
-                        elif last_price < 1:
-                            last_price_display = f"${last_price:.4f}".rstrip('0').rstrip('.')
-                        else:
-                            last_price_display = f"${last_price:,.2f}"
-
-                        message = (
-                            f"⚠️ *Price Alert* ⚠️\n\n"
-                            f"{direction} *{coin_name}* price changed by *{change:.2f}%*\n"
-                            f"📊 *Your threshold:* {user_threshold}%\n\n"
-                            f"💰 **Current Price:** {price_display}\n"
-                            f"📈 **Previous Price:** {last_price_display}\n"
-                            f"🔄 **Change:** {direction} {change:.2f}%"
-                        )
-
-                        try:
-                            # Send message using asyncio.ensure_future
-                            import asyncio
-                            asyncio.ensure_future(
-                                bot.send_message(chat_id=chat_id, text=message, parse_mode='Markdown'))
-                            print(f"🚨 Alert sent to user {chat_id} for {coin_name}")
-                        except Exception as e:
-                            print(f"❌ Failed to send alert to user {chat_id}: {e}")
+            # Common case: the move doesn't reach any watcher's threshold
+            if change < coin_min_threshold[coin_id]:
+                last_prices[coin_id] = current_price
+                continue
 
-        # Update last known price
-        last_prices[coin_id] = current_price
+            # Determine if price went up or down
+            direction = "📈" if current_price > last_price else "📉"
 
-    storage.save_last_prices(last_prices)
+            # Get coin name for better message
+            coin_info = coin_infos.get(coin_id)
+            coin_name = escape(coin_info['name']) if coin_info else coin_id
 
+            # Format prices once per coin, not once per subscriber
+            price_display = _format_price(current_price)
+            last_price_display = _format_price(last_price)
 
-def start_alerts(bot):
-    """
-    Start the price alert monitoring system
-    Monitors personal coin subscriptions and sends alerts for significant changes
-    """
-    print(f"🔔 Starting price alert monitoring system...")
-    print(f"📊 Monitoring: Personal coin subscriptions only")
-    print(f"⚡ Alert threshold: {ALERT_THRESHOLD}% price change")
+            # Send alerts only to subscribers who are monitoring this specific coin
+            for chat_id in coin_to_subs[coin_id]:
+                # Get user's custom threshold or use default
+                user_threshold = user_alert_thresholds.get(chat_id, ALERT_THRESHOLD)
+
+                if change >= user_threshold:
+                    message = (
+                        f"⚠️ <b>Price Alert</b> ⚠️\n\n"
+                        f"{direction} <b>{coin_name}</b> price changed by <b>{change:.2f}%</b>\n"
+                        f"📊 <b>Your threshold:</b> {user_threshold}%\n\n"
+                        f"💰 <b>Current Price:</b> {price_display}\n"
+                        f"📈 <b>Previous Price:</b> {last_price_display}\n"
+                        f"🔄 <b>Change:</b> {direction} {change:.2f}%"
+                    )
+
+                    # Collect the send so all alerts go out concurrently below
+                    send_tasks.append(_send_with_retry(bot, chat_id, message))
+                    print(f"🚨 Alert queued for user {chat_id} for {coin_name}")
 
-    # Check prices every 5 minutes
-    schedule.every(5).minutes.do(lambda: asyncio.run(check_prices(bot)))
+        # Update last known price
+        last_prices[coin_id] = current_price
 
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    if send_tasks:
+        results = await asyncio.gather(*send_tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"❌ Failed to send alert: {result}")
+
+    _dirty.last_prices = True
+    await flush_dirty()
 
 
 async def start_alerts_async(bot):
@@ -15,10 +15,18 @@ BOT_DESCRIPTION = "CryptoPriceBot - Real-time cryptocurrency prices"
 API_TIMEOUT = 10  # Request timeout in seconds
 CACHE_DURATION = 3600  # Coin list cache duration (1 hour)
 TOP_COINS_CACHE_DURATION = 300  # Top coins cache duration (5 minutes)
+PRICE_CACHE_DURATION = 60  # Price cache duration (1 minute)
 
 # Alert Settings
 ALERT_THRESHOLD = 5.0  # Price change threshold for alerts (5%)
 
+# Admin Settings
+ADMIN_IDS = []  # Chat IDs allowed to use /backup and /restore, e.g. [123456789]
+
+# Storage Settings
+STORAGE_BACKEND = "json"  # "json" (default), "sqlite", or "redis" (requires `pip install redis`)
+REDIS_URL = "redis://localhost:6379/0"  # Used when STORAGE_BACKEND = "redis"
+
 # Logging Settings
 LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING, ERROR
 LOG_TO_FILE = True  # Save logs to file
@@ -2,15 +2,302 @@ import httpx
 import json
 import time
 import asyncio
+from types import MappingProxyType
 from typing import Optional, Dict, List, Tuple
 
+# orjson parses the multi-MB CoinGecko payloads 2-3x faster than the
+# stdlib json; fall back to httpx's default parsing if it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _parse_json(response: httpx.Response):
+    """Parse a response body with orjson when available"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
 # Import cache settings from config
 from config import CACHE_DURATION, TOP_COINS_CACHE_DURATION
 
+# Price cache TTL is newer than some configs, so fall back to a default
+try:
+    from config import PRICE_CACHE_DURATION
+except ImportError:
+    PRICE_CACHE_DURATION = 60  # Price cache duration (1 minute)
+
+# Short-lived price cache: (coin_id, currency) -> (timestamp, price)
+# Keeps the alert loop and bursts of commands under the API rate limit.
+# Capped so long-dead (coin, currency) pairs don't accumulate forever
+_PRICE_CACHE: Dict[Tuple[str, str], Tuple[float, float]] = {}
+_PRICE_CACHE_MAXSIZE = 4096
+
+# Cache effectiveness counters, logged periodically so cache TTLs can be
+# tuned against the free-tier request budget
+_CACHE_HITS = 0
+_CACHE_MISSES = 0
+_CACHE_STATS_LOG_EVERY = 500
+_cache_stats_next_log = _CACHE_STATS_LOG_EVERY
+
+
+def _count_cache(hits: int, misses: int):
+    """Record price-cache hits/misses and log totals every few hundred lookups"""
+    global _CACHE_HITS, _CACHE_MISSES, _cache_stats_next_log
+    _CACHE_HITS += hits
+    _CACHE_MISSES += misses
+    total = _CACHE_HITS + _CACHE_MISSES
+    if total >= _cache_stats_next_log:
+        print(f"📊 Price cache: {_CACHE_HITS} hits / {_CACHE_MISSES} misses")
+        _cache_stats_next_log = total + _CACHE_STATS_LOG_EVERY
+
+
+# ETag revalidation cache: url -> (etag, parsed body)
+# A 304 response lets us skip transferring and re-parsing the payload
+_ETAG_CACHE: Dict[str, Tuple[str, object]] = {}
+
+
+async def _get_json_with_etag(url: str):
+    """GET a URL, revalidating with If-None-Match when we hold an ETag"""
+    client = _get_client()
+    headers = {}
+    cached = _ETAG_CACHE.get(url)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+    response = await client.get(url, headers=headers)
+    if response.status_code == 304 and cached:
+        return cached[1]
+    response.raise_for_status()
+    data = _parse_json(response)
+    etag = response.headers.get("ETag")
+    if etag:
+        _ETAG_CACHE[url] = (etag, data)
+    return data
+
+# Shared HTTP client with a keep-alive connection pool
+# Creating a client per request costs a TCP + TLS handshake every time
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Get the shared AsyncClient, creating it lazily on first use"""
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            base_url="https://api.coingecko.com/api/v3",
+            http2=True,
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=40)
+        )
+    return _CLIENT
+
+
+async def close_client():
+    """Close the shared AsyncClient (call once on bot shutdown)"""
+    global _CLIENT
+    if _CLIENT is not None and not _CLIENT.is_closed:
+        await _CLIENT.aclose()
+    _CLIENT = None
+
+
+# Well-known coin mappings for better search results
+# Frozen at module level so calls don't rebuild the dict every time
+_WELL_KNOWN_MAPPINGS = MappingProxyType({
+    'bitcoin': 'bitcoin',
+    'btc': 'bitcoin',
+    'ethereum': 'ethereum',
+    'eth': 'ethereum',
+    'cardano': 'cardano',
+    'ada': 'cardano',
+    'dogecoin': 'dogecoin',
+    'doge': 'dogecoin',
+    'ripple': 'ripple',
+    'xrp': 'ripple',
+    'litecoin': 'litecoin',
+    'ltc': 'litecoin',
+    'solana': 'solana',
+    'sol': 'solana',
+    'binance': 'binancecoin',
+    'bnb': 'binancecoin',
+    'polygon': 'matic-network',
+    'matic': 'matic-network',
+    'chainlink': 'chainlink',
+    'link': 'chainlink',
+    'uniswap': 'uniswap',
+    'uni': 'uniswap',
+    'aave': 'aave',
+    'compound': 'compound-governance-token',
+    'comp': 'compound-governance-token',
+    'sushi': 'sushi',
+    'yearn': 'yearn-finance',
+    'yfi': 'yearn-finance',
+    'curve': 'curve-dao-token',
+    'crv': 'curve-dao-token',
+    'balancer': 'balancer',
+    'bal': 'balancer',
+    'shiba': 'shiba-inu',
+    'shib': 'shiba-inu'
+})
+
+# Well-known symbol -> main coin id, used to disambiguate symbol lookups
+_WELL_KNOWN_SYMBOLS = MappingProxyType({
+    'btc': 'bitcoin',
+    'eth': 'ethereum',
+    'ada': 'cardano',
+    'doge': 'dogecoin',
+    'xrp': 'ripple',
+    'ltc': 'litecoin',
+    'bch': 'bitcoin-cash',
+    'bnb': 'binancecoin',
+    'sol': 'solana',
+    'matic': 'matic-network',
+    'avax': 'avalanche-2',
+    'dot': 'polkadot',
+    'link': 'chainlink',
+    'uni': 'uniswap',
+    'atom': 'cosmos',
+    'shib': 'shiba-inu',
+    'aave': 'aave',
+    'comp': 'compound-governance-token',
+    'sushi': 'sushi',
+    'yfi': 'yearn-finance',
+    'crv': 'curve-dao-token',
+    'bal': 'balancer'
+})
+
+# Common English words that suggest a coin has a simple, popular name
+_COMMON_NAME_WORDS = frozenset(
+    ('coin', 'token', 'protocol', 'network', 'chain', 'defi', 'dao', 'swap', 'dex'))
+
+# Deduplicated fallback set when the supported-currencies endpoint is down
+_FALLBACK_CURRENCIES = frozenset((
+    'usd', 'eur', 'gbp', 'jpy', 'cad', 'aud', 'chf', 'cny', 'rub', 'inr', 'brl', 'krw', 'mxn', 'sek',
+    'nok', 'dkk', 'pln', 'czk', 'huf', 'try', 'zar', 'thb', 'sgd', 'hkd', 'nzd', 'php', 'myr', 'idr',
+    'vnd', 'uah', 'bgn', 'hrk', 'ron', 'rsd', 'isk', 'lkr', 'bdt', 'pkr', 'npr', 'mmk', 'khr', 'lak',
+    'mnt', 'kzt', 'uzs', 'tjs', 'tmt', 'afn', 'amd', 'azn', 'gel', 'kgs', 'mwk', 'zmw', 'bwp', 'szl',
+    'lsl', 'nad', 'etb', 'kes', 'ugx', 'tzs', 'rwf', 'bif', 'djf', 'kmf', 'mga', 'mur', 'sc', 'mvr'))
+
+# Currency symbols for display, frozen so lookups don't rebuild the dict
+_CURRENCY_SYMBOLS = MappingProxyType({
+    'usd': '$',
+    'eur': '€',
+    'gbp': '£',
+    'jpy': '¥',
+    'cad': 'C$',
+    'aud': 'A$',
+    'chf': 'CHF',
+    'cny': '¥',
+    'rub': '₽',
+    'inr': '₹',
+    'brl': 'R$',
+    'krw': '₩',
+    'mxn': '$',
+    'sek': 'kr',
+    'nok': 'kr',
+    'dkk': 'kr',
+    'pln': 'zł',
+    'czk': 'Kč',
+    'huf': 'Ft',
+    'try': '₺',
+    'zar': 'R',
+    'thb': '฿',
+    'sgd': 'S$',
+    'hkd': 'HK$',
+    'nzd': 'NZ$',
+    'php': '₱',
+    'myr': 'RM',
+    'idr': 'Rp',
+    'vnd': '₫',
+    'uah': '₴',
+    'bgn': 'лв',
+    'hrk': 'kn',
+    'ron': 'lei',
+    'rsd': 'дин',
+    'isk': 'kr',
+    'lkr': '₨',
+    'bdt': '৳',
+    'pkr': '₨',
+    'npr': '₨',
+    'mmk': 'K',
+    'khr': '៛',
+    'lak': '₭',
+    'mnt': '₮',
+    'kzt': '₸',
+    'uzs': 'сўм',
+    'tjs': 'SM',
+    'tmt': 'T',
+    'afn': '؋',
+    'amd': '֏',
+    'azn': '₼',
+    'gel': '₾',
+    'kgs': 'сом',
+    'mwk': 'MK',
+    'zmw': 'ZK',
+    'bwp': 'P',
+    'szl': 'L',
+    'lsl': 'L',
+    'nad': 'N$',
+    'etb': 'Br',
+    'kes': 'KSh',
+    'ugx': 'USh',
+    'tzs': 'TSh',
+    'rwf': 'RF',
+    'bif': 'FBu',
+    'djf': 'Fdj',
+    'kmf': 'CF',
+    'mga': 'Ar',
+    'mur': '₨',
+    'sc': '₨',
+    'mvr': 'ރ'
+})
+
 # Cache for coin list to avoid repeated API calls
 COIN_LIST_CACHE = None
 COIN_LIST_CACHE_TIMESTAMP = 0
 
+# Lookup indexes rebuilt whenever the coin list cache is refreshed,
+# so id/symbol lookups are O(1) instead of scanning ~13k coins
+_COIN_BY_ID: Dict[str, Dict] = {}
+_COINS_BY_SYMBOL: Dict[str, List[Dict]] = {}
+
+# Search indexes: precomputed lowercase fields and name tokens plus a
+# token-prefix index (prefixes up to 4 chars) so searches only inspect a
+# handful of candidates without any per-query lowering or splitting
+_NORMALIZED: List[Tuple[str, Tuple[str, ...], str, str, Dict]] = []
+_PREFIX_INDEX: Dict[str, List[int]] = {}
+_PREFIX_INDEX_MAX_LEN = 4
+
+
+def _rebuild_coin_indexes(coins: List[Dict]):
+    """Rebuild the id/symbol lookup and search indexes from a fresh coin list"""
+    global _COIN_BY_ID, _COINS_BY_SYMBOL, _NORMALIZED, _PREFIX_INDEX
+    coin_by_id = {}
+    coins_by_symbol = {}
+    normalized = []
+    prefix_index = {}
+    for idx, coin in enumerate(coins):
+        name_lower = coin.get('name', '').lower()
+        symbol_lower = coin.get('symbol', '').lower()
+        id_lower = coin.get('id', '').lower()
+        name_tokens = tuple(name_lower.split())
+
+        coin_by_id[coin.get('id')] = coin
+        coins_by_symbol.setdefault(symbol_lower, []).append(coin)
+        normalized.append((name_lower, name_tokens, symbol_lower, id_lower, coin))
+
+        seen_prefixes = set()
+        for token in name_tokens + (id_lower, symbol_lower):
+            for length in range(1, min(len(token), _PREFIX_INDEX_MAX_LEN) + 1):
+                prefix = token[:length]
+                if prefix not in seen_prefixes:
+                    seen_prefixes.add(prefix)
+                    prefix_index.setdefault(prefix, []).append(idx)
+    _COIN_BY_ID = coin_by_id
+    _COINS_BY_SYMBOL = coins_by_symbol
+    _NORMALIZED = normalized
+    _PREFIX_INDEX = prefix_index
+
 # Cache for top coins (market data changes frequently)
 TOP_COINS_CACHE = None
 TOP_COINS_CACHE_TIMESTAMP = 0
@@ -30,14 +317,13 @@ async def get_all_coins() -> List[Dict]:
         return COIN_LIST_CACHE
 
     try:
-        url = "https://api.coingecko.com/api/v3/coins/list"
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-
-            COIN_LIST_CACHE = response.json()
-            COIN_LIST_CACHE_TIMESTAMP = current_time
-            return COIN_LIST_CACHE
+        data = await _get_json_with_etag("/coins/list")
+        # A 304 revalidation returns the same object; skip the index rebuild
+        if data is not COIN_LIST_CACHE:
+            _rebuild_coin_indexes(data)
+        COIN_LIST_CACHE = data
+        COIN_LIST_CACHE_TIMESTAMP = current_time
+        return COIN_LIST_CACHE
     except Exception as e:
         print(f"Error fetching coin list: {e}")
         return COIN_LIST_CACHE or []
@@ -56,58 +342,12 @@ async def search_coins(query: str, limit: int = 10) -> List[Dict]:
     exact_matches = []
     partial_matches = []
 
-    # Well-known coin mappings for better search results
-    well_known_mappings = {
-        'bitcoin': 'bitcoin',
-        'btc': 'bitcoin',
-        'ethereum': 'ethereum',
-        'eth': 'ethereum',
-        'cardano': 'cardano',
-        'ada': 'cardano',
-        'dogecoin': 'dogecoin',
-        'doge': 'dogecoin',
-        'ripple': 'ripple',
-        'xrp': 'ripple',
-        'litecoin': 'litecoin',
-        'ltc': 'litecoin',
-        'solana': 'solana',
-        'sol': 'solana',
-        'binance': 'binancecoin',
-        'bnb': 'binancecoin',
-        'polygon': 'matic-network',
-        'matic': 'matic-network',
-        'chainlink': 'chainlink',
-        'link': 'chainlink',
-        'uniswap': 'uniswap',
-        'uni': 'uniswap',
-        'aave': 'aave',
-        'compound': 'compound-governance-token',
-        'comp': 'compound-governance-token',
-        'sushi': 'sushi',
-        'yearn': 'yearn-finance',
-        'yfi': 'yearn-finance',
-        'curve': 'curve-dao-token',
-        'crv': 'curve-dao-token',
-        'balancer': 'balancer',
-        'bal': 'balancer',
-        'shiba': 'shiba-inu',
-        'shib': 'shiba-inu'
-    }
-
-    # Check well-known mappings first
-    if query_lower in well_known_mappings:
-        target_id = well_known_mappings[query_lower]
-        for coin in all_coins:
-            if coin.get('id') == target_id:
-                return [coin] + [c for c in all_coins if c.get('id') != target_id and (
-                        query_lower in c.get('name', '').lower() or
-                        query_lower in c.get('symbol', '').lower()
-                )][:limit - 1]
-
-    for coin in all_coins:
-        coin_name = coin.get('name', '').lower()
-        coin_symbol = coin.get('symbol', '').lower()
-        coin_id = coin.get('id', '').lower()
+    # Gather candidates from the prefix index instead of scanning every coin;
+    # only these few candidates get the full string checks below
+    candidate_indices = _PREFIX_INDEX.get(query_lower[:_PREFIX_INDEX_MAX_LEN], [])
+
+    for idx in candidate_indices:
+        coin_name, name_tokens, coin_symbol, coin_id, coin = _NORMALIZED[idx]
 
         # Check for exact matches first (highest priority)
         if (coin_symbol == query_lower or
@@ -115,11 +355,10 @@ async def search_coins(query: str, limit: int = 10) -> List[Dict]:
                 coin_name == query_lower):
             exact_matches.append(coin)
         # Check for word-based partial matches (medium priority)
-        elif (query_lower in coin_name.split() or
-              query_lower in coin_symbol.split() or
-              query_lower in coin_id.split() or
-              any(word.startswith(query_lower) for word in coin_name.split()) or
-              any(word.startswith(query_lower) for word in coin_id.split())):
+        elif (query_lower in name_tokens or
+              coin_symbol.startswith(query_lower) or
+              coin_id.startswith(query_lower) or
+              any(word.startswith(query_lower) for word in name_tokens)):
             partial_matches.append(coin)
         # Check for substring matches (lower priority, but still useful for rare coins)
         elif (query_lower in coin_name or
@@ -127,69 +366,81 @@ async def search_coins(query: str, limit: int = 10) -> List[Dict]:
               query_lower in coin_id):
             partial_matches.append(coin)
 
+    # Check well-known mappings: pin the main coin ahead of other matches
+    if query_lower in _WELL_KNOWN_MAPPINGS:
+        target_id = _WELL_KNOWN_MAPPINGS[query_lower]
+        target_coin = _COIN_BY_ID.get(target_id)
+        if target_coin:
+            others = [c for c in exact_matches + partial_matches if c.get('id') != target_id]
+            return [target_coin] + others[:limit - 1]
+
     # Sort all matches by popularity score (highest first)
     all_matches = exact_matches + partial_matches
 
-    # Calculate popularity scores for all matches
-    popularity_scores = []
-    for coin in all_matches:
-        score = await get_coin_popularity_score(coin)
-        popularity_scores.append((coin, score))
-
-    # Sort by score and return coins
-    popularity_scores.sort(key=lambda x: x[1], reverse=True)
-    sorted_coins = [coin for coin, score in popularity_scores]
+    # Fetch top-coin data once, then score every match synchronously
+    top100_rank = await _get_top100_rank()
+    all_matches.sort(key=lambda c: _score_coin_sync(c, top100_rank), reverse=True)
 
-    return sorted_coins[:limit]
+    return all_matches[:limit]
 
 
 async def get_coin_by_id(coin_id: str) -> Optional[Dict]:
     """
     Get coin information by CoinGecko ID
     """
-    all_coins = await get_all_coins()
-    for coin in all_coins:
-        if coin.get('id') == coin_id:
-            return coin
-    return None
+    await get_all_coins()
+    return _COIN_BY_ID.get(coin_id)
 
 
-async def get_coin_popularity_score(coin: Dict) -> int:
+async def get_multiple_coins(coin_ids: List[str]) -> Dict[str, Optional[Dict]]:
+    """
+    Get coin information for several CoinGecko IDs in one pass
+    """
+    # One coin-list refresh covers every lookup; the rest is index access
+    await get_all_coins()
+    return {coin_id: _COIN_BY_ID.get(coin_id) for coin_id in coin_ids}
+
+
+# Memoized scores, invalidated whenever the top-coins cache refreshes
+_SCORE_CACHE: Dict[str, int] = {}
+_SCORE_CACHE_TIMESTAMP = 0
+
+
+def _score_coin_sync(coin: Dict, top100_rank: Dict[str, int]) -> int:
     """
     Calculate popularity score for a coin based on various factors
     Higher score = more popular coin
+    Takes a precomputed top-100 rank lookup so no awaits happen per candidate
     """
-    score = 0
+    global _SCORE_CACHE, _SCORE_CACHE_TIMESTAMP
+
+    if _SCORE_CACHE_TIMESTAMP != TOP_COINS_CACHE_TIMESTAMP:
+        _SCORE_CACHE = {}
+        _SCORE_CACHE_TIMESTAMP = TOP_COINS_CACHE_TIMESTAMP
+
     coin_id = coin.get('id', '').lower()
+    cached_score = _SCORE_CACHE.get(coin_id)
+    if cached_score is not None:
+        return cached_score
+
+    score = 0
     coin_name = coin.get('name', '').lower()
     symbol = coin.get('symbol', '').lower()
 
-    # Check if it's in top 100 by market cap
-    try:
-        top_coins = await get_top_coins(100)
-        top_coin_ids = [c['id'] for c in top_coins]
-        if coin_id in top_coin_ids:
-            score += 1000 - top_coin_ids.index(coin_id)
-    except:
-        pass
-
-    # Get top 20 coins dynamically (always up-to-date)
-    try:
-        top_20_coins = await get_top_coins(20)
-        if top_20_coins:  # Check if we got data
-            top_20_ids = [c['id'] for c in top_20_coins]
-            if coin_id in top_20_ids:
-                score += 500  # Bonus for being in top 20
-    except:
-        pass
+    # Check if it's in top 100 by market cap; top 20 is just rank < 20,
+    # so one fetch covers both bonuses
+    rank = top100_rank.get(coin_id)
+    if rank is not None:
+        score += 1000 - rank
+        if rank < 20:
+            score += 500
 
     # Bonus for coins with short, common symbols
     if len(symbol) <= 4 and symbol.isalpha():
         score += 100
 
     # Bonus for coins with common English words in name
-    common_words = ['coin', 'token', 'protocol', 'network', 'chain', 'defi', 'dao', 'swap', 'dex']
-    if any(word in coin_name for word in common_words):
+    if any(word in coin_name for word in _COMMON_NAME_WORDS):
         score += 50
 
     # Bonus for coins with simple, memorable names
@@ -209,7 +460,23 @@ async def get_coin_popularity_score(coin: Dict) -> int:
         score -= 20
 
     # Ensure minimum score for any valid coin
-    return max(score, 1)
+    score = max(score, 1)
+    _SCORE_CACHE[coin_id] = score
+    return score
+
+
+async def _get_top100_rank() -> Dict[str, int]:
+    """Fetch the top-100 coins once and build the rank lookup scoring needs"""
+    top_100 = await get_top_coins(100)
+    return {c['id']: i for i, c in enumerate(top_100)}
+
+
+async def get_coin_popularity_score(coin: Dict) -> int:
+    """
+    Calculate popularity score for a coin based on various factors
+    Higher score = more popular coin
+    """
+    return _score_coin_sync(coin, await _get_top100_rank())
 
 
 async def get_coin_by_symbol(symbol: str) -> Optional[Dict]:
@@ -217,47 +484,17 @@ async def get_coin_by_symbol(symbol: str) -> Optional[Dict]:
     Get coin information by symbol (e.g., 'btc', 'eth')
     Prioritizes popular coins over less common ones
     """
-    all_coins = await get_all_coins()
+    await get_all_coins()
     symbol_lower = symbol.lower()
 
-    # First, try to find exact matches with well-known symbols
-    well_known_symbols = {
-        'btc': 'bitcoin',
-        'eth': 'ethereum',
-        'ada': 'cardano',
-        'doge': 'dogecoin',
-        'xrp': 'ripple',
-        'ltc': 'litecoin',
-        'bch': 'bitcoin-cash',
-        'bnb': 'binancecoin',
-        'sol': 'solana',
-        'matic': 'matic-network',
-        'avax': 'avalanche-2',
-        'dot': 'polkadot',
-        'link': 'chainlink',
-        'uni': 'uniswap',
-        'atom': 'cosmos',
-        'shib': 'shiba-inu',
-        'aave': 'aave',
-        'comp': 'compound-governance-token',
-        'sushi': 'sushi',
-        'yfi': 'yearn-finance',
-        'crv': 'curve-dao-token',
-        'bal': 'balancer'
-    }
-
     # If it's a well-known symbol, prioritize the main coin
-    if symbol_lower in well_known_symbols:
-        main_coin_id = well_known_symbols[symbol_lower]
-        for coin in all_coins:
-            if coin.get('id') == main_coin_id:
-                return coin
-
-    # Find all coins with matching symbol
-    matching_coins = []
-    for coin in all_coins:
-        if coin.get('symbol', '').lower() == symbol_lower:
-            matching_coins.append(coin)
+    if symbol_lower in _WELL_KNOWN_SYMBOLS:
+        main_coin = _COIN_BY_ID.get(_WELL_KNOWN_SYMBOLS[symbol_lower])
+        if main_coin:
+            return main_coin
+
+    # Find all coins with matching symbol via the prebuilt index
+    matching_coins = _COINS_BY_SYMBOL.get(symbol_lower, [])
 
     if not matching_coins:
         return None
@@ -267,67 +504,70 @@ async def get_coin_by_symbol(symbol: str) -> Optional[Dict]:
         return matching_coins[0]
 
     # If multiple matches, return the most popular one
-    best_coin = None
-    best_score = -1
+    top100_rank = await _get_top100_rank()
+    return max(matching_coins, key=lambda c: _score_coin_sync(c, top100_rank))
 
-    for coin in matching_coins:
-        score = await get_coin_popularity_score(coin)
-        if score > best_score:
-            best_score = score
-            best_coin = coin
 
-    return best_coin
-
-
-async def get_price(coin_id: str, currency: str = 'usd') -> Optional[float]:
+async def get_price(coin_id: str, currency: str = 'usd', force_refresh: bool = False) -> Optional[float]:
     """
     Get the current price of a coin in specified currency using CoinGecko API
-    NOTE: Prices are NOT cached to ensure real-time accuracy
+    Prices are served from a short TTL cache; pass force_refresh=True to bypass it
     """
     if not coin_id:
         return None
 
-    url = f"https://api.coingecko.com/api/v3/simple/price?ids={coin_id}&vs_currencies={currency.lower()}"
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            if coin_id in data and currency.lower() in data[coin_id]:
-                return data[coin_id][currency.lower()]
-            return None
-    except Exception as e:
-        print(f"Error fetching price for {coin_id} in {currency}: {e}")
-        return None
+    prices = await get_multiple_prices([coin_id], currency, force_refresh=force_refresh)
+    return prices.get(coin_id)
 
 
-async def get_multiple_prices(coin_ids: List[str], currency: str = 'usd') -> Dict[str, float]:
+async def get_multiple_prices(coin_ids: List[str], currency: str = 'usd',
+                              force_refresh: bool = False) -> Dict[str, float]:
     """
     Get prices for multiple coins at once (more efficient than individual calls)
-    NOTE: Prices are NOT cached to ensure real-time accuracy
+    Recently fetched prices come from a short TTL cache; only stale ids hit
+    the network. Pass force_refresh=True to bypass the cache entirely
     """
     if not coin_ids:
         return {}
 
+    currency_lower = currency.lower()
+    current_time = time.time()
+    prices = {}
+    stale_ids = []
+
     # CoinGecko API supports up to 250 coins per request
-    coin_ids_str = ','.join(coin_ids[:250])
-    url = f"https://api.coingecko.com/api/v3/simple/price?ids={coin_ids_str}&vs_currencies={currency.lower()}"
+    for coin_id in coin_ids[:250]:
+        cached = None if force_refresh else _PRICE_CACHE.get((coin_id, currency_lower))
+        if cached and (current_time - cached[0]) < PRICE_CACHE_DURATION:
+            prices[coin_id] = cached[1]
+        else:
+            stale_ids.append(coin_id)
+
+    _count_cache(len(prices), len(stale_ids))
+
+    if not stale_ids:
+        return prices
+
+    url = f"/simple/price?ids={','.join(stale_ids)}&vs_currencies={currency_lower}"
 
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            prices = {}
-            for coin_id in coin_ids:
-                if coin_id in data and currency.lower() in data[coin_id]:
-                    prices[coin_id] = data[coin_id][currency.lower()]
-            return prices
+        client = _get_client()
+        response = await client.get(url, timeout=15.0)
+        response.raise_for_status()
+        data = _parse_json(response)
+
+        for coin_id in stale_ids:
+            if coin_id in data and currency_lower in data[coin_id]:
+                price = data[coin_id][currency_lower]
+                prices[coin_id] = price
+                if len(_PRICE_CACHE) >= _PRICE_CACHE_MAXSIZE:
+                    # Drop the oldest entry (dicts keep insertion order)
+                    _PRICE_CACHE.pop(next(iter(_PRICE_CACHE)))
+                _PRICE_CACHE[(coin_id, currency_lower)] = (current_time, price)
+        return prices
     except Exception as e:
         print(f"Error fetching multiple prices in {currency}: {e}")
-        return {}
+        return prices
 
 
 async def get_supported_currencies() -> List[str]:
@@ -335,100 +575,18 @@ async def get_supported_currencies() -> List[str]:
     Get list of supported fiat currencies from CoinGecko API
     """
     try:
-        url = "https://api.coingecko.com/api/v3/simple/supported_vs_currencies"
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            return response.json()
+        return await _get_json_with_etag("/simple/supported_vs_currencies")
     except Exception as e:
         print(f"Error fetching supported currencies: {e}")
         # Return common currencies as fallback
-        return ['usd', 'eur', 'gbp', 'jpy', 'cad', 'aud', 'chf', 'cny', 'rub', 'inr', 'brl', 'krw', 'mxn', 'sek', 'nok',
-                'dkk', 'pln', 'czk', 'huf', 'try', 'zar', 'thb', 'sgd', 'hkd', 'nzd', 'php', 'myr', 'idr', 'vnd', 'uah',
-                'bgn', 'hrk', 'ron', 'rsd', 'isk', 'lkr', 'bdt', 'pkr', 'npr', 'lkr', 'mmk', 'khr', 'lak', 'mnt', 'kzt',
-                'uzs', 'tjs', 'tmt', 'afn', 'amd', 'azn', 'gel', 'kgs', 'mwk', 'zmw', 'bwp', 'szl', 'lsl', 'nad', 'etb',
-                'kes', 'ugx', 'tzs', 'rwf', 'bif', 'djf', 'kmf', 'mga', 'mur', 'sc', 'mvr', 'npr', 'pkr', 'lkr', 'bdt',
-                'afn', 'amd', 'azn', 'gel', 'kgs', 'tjs', 'tmt', 'uzs', 'kzt', 'mnt', 'khr', 'lak', 'mmk', 'npr', 'pkr',
-                'lkr', 'bdt', 'afn', 'amd', 'azn', 'gel', 'kgs', 'tjs', 'tmt', 'uzs', 'kzt', 'mnt', 'khr', 'lak', 'mmk']
+        return list(_FALLBACK_CURRENCIES)
 
 
 def get_currency_symbol(currency: str) -> str:
     """
     Get currency symbol for display
     """
-    currency_symbols = {
-        'usd': '$',
-        'eur': '€',
-        'gbp': '£',
-        'jpy': '¥',
-        'cad': 'C$',
-        'aud': 'A$',
-        'chf': 'CHF',
-        'cny': '¥',
-        'rub': '₽',
-        'inr': '₹',
-        'brl': 'R$',
-        'krw': '₩',
-        'mxn': '$',
-        'sek': 'kr',
-        'nok': 'kr',
-        'dkk': 'kr',
-        'pln': 'zł',
-        'czk': 'Kč',
-        'huf': 'Ft',
-        'try': '₺',
-        'zar': 'R',
-        'thb': '฿',
-        'sgd': 'S$',
-        'hkd': 'HK$',
-        'nzd': 'NZ$',
-        'php': '₱',
-        'myr': 'RM',
-        'idr': 'Rp',
-        'vnd': '₫',
-        'uah': '₴',
-        'bgn': 'лв',
-        'hrk': 'kn',
-        'ron': 'lei',
-        'rsd': 'дин',
-        'isk': 'kr',
-        'lkr': '₨',
-        'bdt': '৳',
-        'pkr': '₨',
-        'npr': '₨',
-        'mmk': 'K',
-        'khr': '៛',
-        'lak': '₭',
-        'mnt': '₮',
-        'kzt': '₸',
-        'uzs': 'сўм',
-        'tjs': 'SM',
-        'tmt': 'T',
-        'afn': '؋',
-        'amd': '֏',
-        'azn': '₼',
-        'gel': '₾',
-        'kgs': 'сом',
-        'mwk': 'MK',
-        'zmw': 'ZK',
-        'bwp': 'P',
-        'szl': 'L',
-        'lsl': 'L',
-        'nad': 'N$',
-        'etb': 'Br',
-        'kes': 'KSh',
-        'ugx': 'USh',
-        'tzs': 'TSh',
-        'rwf': 'RF',
-        'bif': 'FBu',
-        'djf': 'Fdj',
-        'kmf': 'CF',
-        'mga': 'Ar',
-        'mur': '₨',
-        'sc': '₨',
-        'mvr': 'ރ'
-    }
-    return currency_symbols.get(currency.lower(), currency.upper())
+    return _CURRENCY_SYMBOLS.get(currency.lower(), currency.upper())
 
 
 async def get_top_coins(limit: int = 100) -> List[Dict]:
@@ -446,14 +604,10 @@ async def get_top_coins(limit: int = 100) -> List[Dict]:
         return TOP_COINS_CACHE[:limit]
 
     try:
-        url = f"https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&order=market_cap_desc&per_page={limit}&page=1"
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-
-            TOP_COINS_CACHE = response.json()
-            TOP_COINS_CACHE_TIMESTAMP = current_time
-            return TOP_COINS_CACHE
+        url = f"/coins/markets?vs_currency=usd&order=market_cap_desc&per_page={limit}&page=1"
+        TOP_COINS_CACHE = await _get_json_with_etag(url)
+        TOP_COINS_CACHE_TIMESTAMP = current_time
+        return TOP_COINS_CACHE
     except Exception as e:
         print(f"Error fetching top coins: {e}")
         return TOP_COINS_CACHE or []
\ No newline at end of file
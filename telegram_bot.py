@@ -1,14 +1,20 @@
-import threading
 import asyncio
+import logging
+import logging.handlers
+import queue
+import time
+from html import escape
+from aiolimiter import AsyncLimiter
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, ContextTypes
 from crypto_api import (
-    get_price, get_coin_by_symbol, get_coin_by_id,
+    get_price, get_coin_by_symbol, get_coin_by_id, get_multiple_coins,
     search_coins, get_top_coins, get_multiple_prices,
-    get_supported_currencies, get_currency_symbol
+    get_supported_currencies, get_currency_symbol, close_client,
+    _FALLBACK_CURRENCIES
 )
 from alerts import (
-    start_alerts, start_alerts_async, subscribers,
+    start_alerts_async, flush_dirty, subscribers,
     add_coin_to_user_subscription, remove_coin_from_user_subscription,
     clear_user_coin_subscriptions, get_user_monitored_coins,
     add_subscriber, remove_subscriber, set_user_alert_threshold
@@ -21,71 +27,236 @@ from config import TELEGRAM_API_TOKEN, ALERT_THRESHOLD
 # Telegram bot configuration
 API_TOKEN = TELEGRAM_API_TOKEN
 
+# Admin chat IDs for /backup and /restore, frozen once at import
+try:
+    from config import ADMIN_IDS
+    ADMIN_IDS = frozenset(ADMIN_IDS)
+except ImportError:
+    ADMIN_IDS = frozenset()
+
+log = logging.getLogger("bot")
+
+
+def _setup_logging():
+    """Route log records through a queue so handlers never block on I/O"""
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    return listener
+
+# Outgoing-message pacing: Telegram allows ~30 msgs/s globally and
+# ~20 msgs/min per chat; staying under both proactively avoids the
+# 429 retry/backoff cycle entirely
+_GLOBAL_LIMITER = AsyncLimiter(30, 1)
+_CHAT_LIMITERS = {}
+_CHAT_LIMITERS_MAX = 1024
+
+
+def _chat_limiter(chat_id):
+    limiter = _CHAT_LIMITERS.get(chat_id)
+    if limiter is None:
+        # Cap the table so a long-running bot doesn't keep a limiter for
+        # every chat it has ever messaged; evicting an idle chat merely
+        # resets its rate window
+        if len(_CHAT_LIMITERS) >= _CHAT_LIMITERS_MAX:
+            _CHAT_LIMITERS.pop(next(iter(_CHAT_LIMITERS)))
+        limiter = _CHAT_LIMITERS[chat_id] = AsyncLimiter(20, 60)
+    return limiter
+
+
+async def safe_reply(message, *args, **kwargs):
+    """reply_text paced by the global and per-chat rate limiters"""
+    async with _GLOBAL_LIMITER, _chat_limiter(message.chat_id):
+        return await message.reply_text(*args, **kwargs)
+
+
+async def safe_edit(query, *args, **kwargs):
+    """edit_message_text paced by the global and per-chat rate limiters"""
+    async with _GLOBAL_LIMITER, _chat_limiter(query.message.chat_id):
+        return await query.edit_message_text(*args, **kwargs)
+
+
+# In-process single-flight map: concurrent identical lookups share one
+# task, so a burst of users asking for the same coin produces a single
+# upstream request instead of N duplicates
+_inflight = {}
+
+
+def _single_flight(key, coro_factory):
+    """Share one in-flight task per key among concurrent callers"""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(coro_factory())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return task
+
+
+async def fetch_price_sf(coin_id: str, currency: str = 'usd'):
+    """get_price with concurrent-request coalescing"""
+    return await _single_flight(f"price:{coin_id}:{currency}",
+                                lambda: get_price(coin_id, currency))
+
+
+# Resolved symbol -> coin cache: symbol-to-ID mappings are effectively
+# immutable over a day, while the same handful of symbols dominate queries
+_RESOLVE_CACHE = {}
+_RESOLVE_CACHE_MAXSIZE = 4096
+_RESOLVE_CACHE_DURATION = 86400
+
+
+async def resolve_symbol_sf(symbol: str):
+    """get_coin_by_symbol with result caching and request coalescing"""
+    cached = _RESOLVE_CACHE.get(symbol)
+    if cached and time.time() - cached[0] < _RESOLVE_CACHE_DURATION:
+        return cached[1]
+
+    coin_info = await _single_flight(f"sym:{symbol}",
+                                     lambda: get_coin_by_symbol(symbol))
+    if coin_info:
+        if len(_RESOLVE_CACHE) >= _RESOLVE_CACHE_MAXSIZE:
+            # Drop the oldest entry (dicts keep insertion order)
+            _RESOLVE_CACHE.pop(next(iter(_RESOLVE_CACHE)))
+        _RESOLVE_CACHE[symbol] = (time.time(), coin_info)
+    return coin_info
+
+
+async def resolve_coin(coin_input: str):
+    """Resolve a user-typed name or symbol to a coin, falling back to search"""
+    coin_info = await resolve_symbol_sf(coin_input.lower())
+    if not coin_info:
+        search_results = await search_coins(coin_input, limit=1)
+        if search_results:
+            coin_info = search_results[0]
+    return coin_info
+
+
+# Static reply bodies, built once at import instead of per command
+WELCOME_TEXT = (
+    "🤖 <b>CryptoPriceBot</b>\n\n"
+    "Real-time crypto prices from CoinGecko!\n"
+    "18,000+ cryptocurrencies supported 🚀\n\n"
+    "💡 <b>Quick Start:</b>\n"
+    "• <code>/price btc</code> - Get Bitcoin price\n"
+    "• <code>/search doge</code> - Find Dogecoin\n"
+    "• <code>/addcoin eth</code> - Add Ethereum to alerts\n\n"
+    "📋 Use <code>/help</code> for all commands"
+)
+
+HELP_TEXT = (
+    "📋 <b>Complete Command Reference</b>\n\n"
+    "🔍 <b>Price Commands:</b>\n"
+    "• <code>/price &lt;coin&gt;</code> - Get current price in USD\n"
+    "• <code>/price &lt;coin&gt; &lt;currency&gt;</code> - Get price in specific currency\n"
+    "• <code>/prices &lt;coin1&gt; &lt;coin2&gt; ...</code> - Multiple prices in USD (max 10)\n"
+    "• <code>/prices &lt;coin1&gt; &lt;coin2&gt; &lt;currency&gt;</code> - Multiple prices in specific currency\n"
+    "• <code>/currencies</code> - Show supported currencies\n\n"
+    "🔎 <b>Search Commands:</b>\n"
+    "• <code>/search &lt;query&gt;</code> - Search by name or symbol\n"
+    "• <code>/top [limit]</code> - Top coins by market cap (max 50)\n\n"
+    "🔔 <b>Alert Commands:</b>\n"
+    "• <code>/subscribe [threshold]</code> - Subscribe to price alerts\n"
+    "• <code>/unsubscribe</code> - Unsubscribe from alerts\n"
+    "• <code>/settings</code> - Show your alert settings\n\n"
+    "🪙 <b>Personal Coin Alerts:</b>\n"
+    "• <code>/addcoin &lt;coin&gt;</code> - Add coin to personal alerts\n"
+    "• <code>/removecoin &lt;coin&gt;</code> - Remove coin from personal alerts\n"
+    "• <code>/mycoins</code> - Show your personal coin subscriptions\n"
+    "• <code>/clearcoins</code> - Clear all personal subscriptions\n\n"
+    "ℹ️ <b>Other Commands:</b>\n"
+    "• <code>/start</code> - Welcome message\n"
+    "• <code>/help</code> - This help message\n\n"
+    "💡 <b>Usage Tips:</b>\n"
+    "• Use coin names, symbols, or IDs\n"
+    "• Search is case-insensitive\n"
+    "• Threshold range: 0.1% - 50%\n"
+    "• Supports 18,000+ cryptocurrencies\n\n"
+    "🎯 <b>Examples:</b>\n"
+    "<code>/price btc</code> <code>/price ethereum eur</code> <code>/search doge</code>\n"
+    "<code>/top 20</code> <code>/subscribe 2.5</code> <code>/prices btc eth rub</code>\n"
+    "<code>/currencies</code> <code>/price doge jpy</code>"
+)
+
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Welcome message and bot introduction"""
     chat_id = update.effective_chat.id
     username = update.effective_user.username
-    print(f"📱 /start received from {username} ({chat_id})")
-
-    welcome_text = (
-        "🤖 *CryptoPriceBot*\n\n"
-        "Real-time crypto prices from CoinGecko!\n"
-        "18,000+ cryptocurrencies supported 🚀\n\n"
-        "💡 *Quick Start:*\n"
-        "• `/price btc` - Get Bitcoin price\n"
-        "• `/search doge` - Find Dogecoin\n"
-        "• `/addcoin eth` - Add Ethereum to alerts\n\n"
-        "📋 Use `/help` for all commands"
-    )
+    log.info("📱 /start received from %s (%s)", username, chat_id)
 
-    await update.message.reply_text(welcome_text, parse_mode='Markdown')
+    await safe_reply(update.message, WELCOME_TEXT, parse_mode='HTML')
 
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show detailed help information"""
-    help_text = (
-        "📋 *Complete Command Reference*\n\n"
-        "🔍 *Price Commands:*\n"
-        "• `/price <coin>` - Get current price in USD\n"
-        "• `/price <coin> <currency>` - Get price in specific currency\n"
-        "• `/prices <coin1> <coin2> ...` - Multiple prices in USD (max 10)\n"
-        "• `/prices <coin1> <coin2> <currency>` - Multiple prices in specific currency\n"
-        "• `/currencies` - Show supported currencies\n\n"
-        "🔎 *Search Commands:*\n"
-        "• `/search <query>` - Search by name or symbol\n"
-        "• `/top [limit]` - Top coins by market cap (max 50)\n\n"
-        "🔔 *Alert Commands:*\n"
-        "• `/subscribe [threshold]` - Subscribe to price alerts\n"
-        "• `/unsubscribe` - Unsubscribe from alerts\n"
-        "• `/settings` - Show your alert settings\n\n"
-        "🪙 *Personal Coin Alerts:*\n"
-        "• `/addcoin <coin>` - Add coin to personal alerts\n"
-        "• `/removecoin <coin>` - Remove coin from personal alerts\n"
-        "• `/mycoins` - Show your personal coin subscriptions\n"
-        "• `/clearcoins` - Clear all personal subscriptions\n\n"
-        "ℹ️ *Other Commands:*\n"
-        "• `/start` - Welcome message\n"
-        "• `/help` - This help message\n\n"
-        "💡 *Usage Tips:*\n"
-        "• Use coin names, symbols, or IDs\n"
-        "• Search is case-insensitive\n"
-        "• Threshold range: 0.1% - 50%\n"
-        "• Supports 18,000+ cryptocurrencies\n\n"
-        "🎯 *Examples:*\n"
-        "`/price btc` `/price ethereum eur` `/search doge`\n"
-        "`/top 20` `/subscribe 2.5` `/prices btc eth rub`\n"
-        "`/currencies` `/price doge jpy`"
-    )
+    await safe_reply(update.message, HELP_TEXT, parse_mode='HTML')
+
+
+# Shared message template: the price card is rendered by /price and the
+# inline price buttons, so it lives here instead of being rebuilt inline
+PRICE_CARD_TEMPLATE = (
+    "💰 <b>{name} ({symbol})</b>\n\n"
+    "💵 <b>Current Price:</b> {price}\n"
+    "🆔 <b>Coin ID:</b> <code>{coin_id}</code>"
+)
+
+
+def format_price(value, symbol="$"):
+    """Format a price for display, with more decimals for small values"""
+    if value < 0.01:
+        # For very small prices, show more decimal places
+        return f"{symbol}{value:.6f}".rstrip('0').rstrip('.')
+    elif value < 1:
+        # For small prices, show 4 decimal places
+        return f"{symbol}{value:.4f}".rstrip('0').rstrip('.')
+    # For normal prices, show 2 decimal places with commas
+    return f"{symbol}{value:,.2f}"
+
+
+# Supported fiat codes: membership beats the old "3 letters and
+# alphabetic" guess, which treated coin symbols like ada or bnb as
+# currencies. The list is frozen once fetched for real, but if the
+# fetch failed and returned the error fallback it is retried after a
+# short interval, so an outage at startup can't misclassify the codes
+# missing from the fallback until the process restarts
+_SUPPORTED_FIAT = None
+_SUPPORTED_FIAT_RETRY = 600
+_supported_fiat_retry_at = 0.0
+
 
-    await update.message.reply_text(help_text, parse_mode='Markdown')
+async def _supported_fiat():
+    """Get the frozenset of supported vs-currency codes"""
+    global _SUPPORTED_FIAT, _supported_fiat_retry_at
+    if _SUPPORTED_FIAT is None or (
+            _SUPPORTED_FIAT == _FALLBACK_CURRENCIES
+            and time.time() >= _supported_fiat_retry_at):
+        _SUPPORTED_FIAT = frozenset(await get_supported_currencies())
+        _supported_fiat_retry_at = time.time() + _SUPPORTED_FIAT_RETRY
+    return _SUPPORTED_FIAT
+
+
+# Cached /currencies reply: the body only depends on the supported set,
+# which changes rarely, so rebuild it at most every few minutes
+_currencies_cache = None  # (supported set, formatted text, timestamp)
+_CURRENCIES_CACHE_DURATION = 600
 
 
 async def currencies(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show supported currencies"""
+    global _currencies_cache
     try:
         supported_currencies = await get_supported_currencies()
 
+        # Serve the prebuilt reply while the supported set is unchanged
+        supported_set = frozenset(supported_currencies)
+        if (_currencies_cache and _currencies_cache[0] == supported_set and
+                time.time() - _currencies_cache[2] < _CURRENCIES_CACHE_DURATION):
+            await safe_reply(update.message, _currencies_cache[1], parse_mode='HTML')
+            return
+
         # Get common currencies for display
         common_currencies = ['usd', 'eur', 'gbp', 'jpy', 'cad', 'aud', 'chf', 'cny', 'rub', 'inr', 'brl', 'krw', 'mxn',
                              'sek', 'nok', 'dkk', 'pln', 'czk', 'huf', 'try', 'zar', 'thb', 'sgd', 'hkd', 'nzd', 'php',
@@ -94,8 +265,9 @@ async def currencies(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Filter to show only common currencies
         display_currencies = [curr for curr in common_currencies if curr in supported_currencies]
 
-        currencies_text = "💱 *Supported Currencies*\n\n"
-        currencies_text += "**Common Currencies:**\n"
+        # Build the reply in parts and join once instead of growing a
+        # string append by append
+        parts = ["💱 <b>Supported Currencies</b>\n\n", "<b>Common Currencies:</b>\n"]
 
         # Group currencies by region
         regions = {
@@ -107,25 +279,27 @@ async def currencies(update: Update, context: ContextTypes.DEFAULT_TYPE):
         }
 
         for region, currencies in regions.items():
-            available_currencies = [curr for curr in currencies if curr in supported_currencies]
+            available_currencies = [curr for curr in currencies if curr in supported_set]
             if available_currencies:
-                currencies_text += f"\n**{region}:**\n"
-                for curr in available_currencies:
-                    symbol = get_currency_symbol(curr)
-                    currencies_text += f"• {curr.upper()} {symbol}\n"
+                parts.append(f"\n<b>{region}:</b>\n")
+                parts.extend(f"• {curr.upper()} {get_currency_symbol(curr)}\n"
+                             for curr in available_currencies)
+
+        parts.append(f"\n<b>Total supported:</b> {len(supported_currencies)} currencies\n\n")
+        parts.append("<b>Usage:</b>\n"
+                     "• <code>/price btc eur</code> - Bitcoin in Euros\n"
+                     "• <code>/prices btc eth rub</code> - Multiple coins in Rubles\n"
+                     "• <code>/price doge jpy</code> - Dogecoin in Yen")
 
-        currencies_text += f"\n**Total supported:** {len(supported_currencies)} currencies\n\n"
-        currencies_text += "**Usage:**\n"
-        currencies_text += "• `/price btc eur` - Bitcoin in Euros\n"
-        currencies_text += "• `/prices btc eth rub` - Multiple coins in Rubles\n"
-        currencies_text += "• `/price doge jpy` - Dogecoin in Yen"
+        currencies_text = "".join(parts)
+        _currencies_cache = (supported_set, currencies_text, time.time())
 
-        await update.message.reply_text(currencies_text, parse_mode='Markdown')
+        await safe_reply(update.message, currencies_text, parse_mode='HTML')
 
     except Exception as e:
-        await update.message.reply_text(
+        await safe_reply(update.message,
             "❌ Error fetching supported currencies. Please try again later.",
-            parse_mode='Markdown'
+            parse_mode='HTML'
         )
 
 
@@ -133,15 +307,15 @@ async def price(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Get current price of a cryptocurrency"""
     chat_id = update.effective_chat.id
     username = update.effective_user.username
-    print(f"💰 /price received from {username} ({chat_id})")
+    log.info("💰 /price received from %s (%s)", username, chat_id)
 
     if len(context.args) == 0:
-        await update.message.reply_text(
+        await safe_reply(update.message,
             "❌ Please provide a coin name or symbol.\n\n"
-            "Usage: `/price bitcoin` or `/price btc`\n"
-            "Usage: `/price bitcoin eur` or `/price btc rub`\n"
-            "Example: `/price ethereum`",
-            parse_mode='Markdown'
+            "Usage: <code>/price bitcoin</code> or <code>/price btc</code>\n"
+            "Usage: <code>/price bitcoin eur</code> or <code>/price btc rub</code>\n"
+            "Example: <code>/price ethereum</code>",
+            parse_mode='HTML'
         )
         return
 
@@ -153,7 +327,7 @@ async def price(update: Update, context: ContextTypes.DEFAULT_TYPE):
         currency = context.args[1].lower()
 
     # Try to find the coin (get_coin_by_symbol now uses popularity scoring)
-    coin_info = await get_coin_by_symbol(coin_input)
+    coin_info = await resolve_symbol_sf(coin_input)
 
     if not coin_info:
         # Search for coins by name or symbol
@@ -161,71 +335,59 @@ async def price(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if search_results:
             # If multiple results, show options with inline keyboard
             if len(search_results) > 1:
-                keyboard = []
-                for i, coin in enumerate(search_results[:5], 1):
-                    keyboard.append([InlineKeyboardButton(
+                reply_markup = InlineKeyboardMarkup([
+                    [InlineKeyboardButton(
                         f"{i}. {coin['name']} ({coin['symbol'].upper()})",
-                        callback_data=f"price_{coin['id']}"
-                    )])
-
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await update.message.reply_text(
-                    f"🔍 *Multiple coins found for: {coin_input}*\n\n"
+                        callback_data=f"price_{coin['id']}")]
+                    for i, coin in enumerate(search_results[:5], 1)
+                ])
+                await safe_reply(update.message,
+                    f"🔍 <b>Multiple coins found for: {escape(coin_input)}</b>\n\n"
                     "Please select the correct coin:",
                     reply_markup=reply_markup,
-                    parse_mode='Markdown'
+                    parse_mode='HTML'
                 )
                 return
             else:
                 coin_info = search_results[0]
         else:
-            await update.message.reply_text(
-                f"❌ No coin found with name or symbol: `{coin_input}`\n\n"
-                "Try using `/search {coin_input}` to find similar coins.",
-                parse_mode='Markdown'
+            await safe_reply(update.message,
+                f"❌ No coin found with name or symbol: <code>{escape(coin_input)}</code>\n\n"
+                "Try using <code>/search {coin_input}</code> to find similar coins.",
+                parse_mode='HTML'
             )
             return
 
     # Get price for the found coin in specified currency
-    price_value = await get_price(coin_info['id'], currency)
+    price_value = await fetch_price_sf(coin_info['id'], currency)
     if price_value is None:
-        await update.message.reply_text(f"❌ Error fetching price in {currency.upper()}. Please try again later.")
+        await safe_reply(update.message, f"❌ Error fetching price in {currency.upper()}. Please try again later.")
         return
 
     # Get currency symbol
     currency_symbol = get_currency_symbol(currency)
 
-    # Format price with proper formatting
-    if price_value < 0.01:
-        # For very small prices, show more decimal places
-        price_display = f"{currency_symbol}{price_value:.6f}".rstrip('0').rstrip('.')
-    elif price_value < 1:
-        # For small prices, show 4 decimal places
-        price_display = f"{currency_symbol}{price_value:.4f}".rstrip('0').rstrip('.')
-    else:
-        # For normal prices, show 2 decimal places with commas
-        price_display = f"{currency_symbol}{price_value:,.2f}"
-
-    price_text = (
-        f"💰 *{coin_info['name']} ({coin_info['symbol'].upper()})*\n\n"
-        f"💵 **Current Price:** {price_display} ({currency.upper()})\n"
-        f"🆔 **Coin ID:** `{coin_info['id']}`"
+    price_text = PRICE_CARD_TEMPLATE.format(
+        name=escape(coin_info['name']),
+        symbol=coin_info['symbol'].upper(),
+        price=f"{format_price(price_value, currency_symbol)} ({currency.upper()})",
+        coin_id=coin_info['id'],
     )
 
-    await update.message.reply_text(price_text, parse_mode='Markdown')
+    await safe_reply(update.message, price_text, parse_mode='HTML')
 
 
 async def search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Search for cryptocurrencies"""
     chat_id = update.effective_chat.id
     username = update.effective_user.username
-    print(f"🔍 /search received from {username} ({chat_id})")
+    log.info("🔍 /search received from %s (%s)", username, chat_id)
 
     if len(context.args) == 0:
-        await update.message.reply_text(
+        await safe_reply(update.message,
             "❌ Please provide a search query.\n\n"
-            "Usage: `/search bitcoin` or `/search btc`",
-            parse_mode='Markdown'
+            "Usage: <code>/search bitcoin</code> or <code>/search btc</code>",
+            parse_mode='HTML'
         )
         return
 
@@ -233,25 +395,23 @@ async def search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     search_results = await search_coins(query, limit=10)
 
     if not search_results:
-        await update.message.reply_text(f"❌ No coins found matching: `{query}`", parse_mode='Markdown')
+        await safe_reply(update.message, f"❌ No coins found matching: <code>{escape(query)}</code>", parse_mode='HTML')
         return
 
     # Create inline keyboard for search results
-    keyboard = []
-    for coin in search_results[:10]:
-        keyboard.append([InlineKeyboardButton(
+    reply_markup = InlineKeyboardMarkup([
+        [InlineKeyboardButton(
             f"{coin['name']} ({coin['symbol'].upper()})",
-            callback_data=f"price_{coin['id']}"
-        )])
+            callback_data=f"price_{coin['id']}")]
+        for coin in search_results[:10]
+    ])
 
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    search_text = f"🔍 <b>Search results for: {escape(query)}</b>\n\nFound {len(search_results)} coins. Tap to get price:"
 
-    search_text = f"🔍 *Search results for: {query}*\n\nFound {len(search_results)} coins. Tap to get price:"
-
-    await update.message.reply_text(
+    await safe_reply(update.message,
         search_text,
         reply_markup=reply_markup,
-        parse_mode='Markdown'
+        parse_mode='HTML'
     )
 
 
@@ -268,160 +428,167 @@ async def top(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     top_coins = await get_top_coins(limit)
     if not top_coins:
-        await update.message.reply_text("❌ Error fetching top coins. Please try again later.")
+        await safe_reply(update.message, "❌ Error fetching top coins. Please try again later.")
         return
 
     # Create inline keyboard for top coins
-    keyboard = []
-    for coin in top_coins:
-        keyboard.append([InlineKeyboardButton(
+    reply_markup = InlineKeyboardMarkup([
+        [InlineKeyboardButton(
             f"{coin['name']} ({coin['symbol'].upper()})",
-            callback_data=f"price_{coin['id']}"
-        )])
-
-    reply_markup = InlineKeyboardMarkup(keyboard)
+            callback_data=f"price_{coin['id']}")]
+        for coin in top_coins
+    ])
 
-    top_text = f"🏆 *Top {len(top_coins)} Cryptocurrencies by Market Cap*\n\nTap any coin to get its current price:"
+    top_text = f"🏆 <b>Top {len(top_coins)} Cryptocurrencies by Market Cap</b>\n\nTap any coin to get its current price:"
 
-    await update.message.reply_text(
+    await safe_reply(update.message,
         top_text,
         reply_markup=reply_markup,
-        parse_mode='Markdown'
+        parse_mode='HTML'
     )
 
 
 async def prices(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Get prices for multiple cryptocurrencies"""
     if len(context.args) == 0:
-        await update.message.reply_text(
+        await safe_reply(update.message,
             "❌ Please provide coin names or symbols.\n\n"
-            "Usage: `/prices bitcoin ethereum cardano`\n"
-            "Usage: `/prices bitcoin ethereum eur` or `/prices btc eth rub`",
-            parse_mode='Markdown'
+            "Usage: <code>/prices bitcoin ethereum cardano</code>\n"
+            "Usage: <code>/prices bitcoin ethereum eur</code> or <code>/prices btc eth rub</code>",
+            parse_mode='HTML'
         )
         return
 
     # Parse arguments: coins and optional currency
-    coin_list = context.args[:-1] if len(context.args) > 1 else context.args
+    coin_list = context.args
     currency = 'usd'  # Default currency
 
     # Check if last argument is a currency
     if len(context.args) > 1:
         last_arg = context.args[-1].lower()
-        # Check if it's a valid currency (3-letter code)
-        if len(last_arg) == 3 and last_arg.isalpha():
+        # Only treat it as a currency if CoinGecko actually supports it,
+        # so coin symbols like ada or bnb stay coins
+        if last_arg in await _supported_fiat():
             currency = last_arg
             coin_list = context.args[:-1]
 
     if len(coin_list) > 10:
-        await update.message.reply_text("❌ Maximum 10 coins allowed per request.")
+        await safe_reply(update.message, "❌ Maximum 10 coins allowed per request.")
         return
 
+    # Resolve all inputs concurrently; once the first few IDs are known,
+    # start prefetching their prices so the fetch overlaps resolution
+    resolve_tasks = [asyncio.ensure_future(resolve_coin(ci)) for ci in coin_list]
+    prefetch = None
+    early_ids = []
+    for resolve_task in asyncio.as_completed(list(resolve_tasks)):
+        try:
+            coin_info = await resolve_task
+        except Exception:
+            coin_info = None
+        if coin_info:
+            early_ids.append(coin_info['id'])
+        if prefetch is None and len(early_ids) >= 5 and len(resolve_tasks) > 5:
+            prefetch = asyncio.ensure_future(get_multiple_prices(list(early_ids), currency))
+
     coin_ids = []
     coin_names = []
-
-    # Find coin IDs for each input
-    for coin_input in coin_list:
-        coin_info = await get_coin_by_symbol(coin_input.lower())
-        if not coin_info:
-            search_results = await search_coins(coin_input, limit=1)
-            if search_results:
-                coin_info = search_results[0]
-
+    for coin_input, resolve_task in zip(coin_list, resolve_tasks):
+        coin_info = None if resolve_task.exception() else resolve_task.result()
         if coin_info:
             coin_ids.append(coin_info['id'])
-            coin_names.append(f"{coin_info['name']} ({coin_info['symbol'].upper()})")
+            coin_names.append(f"{escape(coin_info['name'])} ({coin_info['symbol'].upper()})")
         else:
-            coin_names.append(f"{coin_input} (not found)")
+            coin_names.append(f"{escape(coin_input)} (not found)")
 
     if not coin_ids:
-        await update.message.reply_text("❌ No valid coins found.")
+        await safe_reply(update.message, "❌ No valid coins found.")
         return
 
-    # Get prices for all coins in specified currency
+    # Get prices for all coins in specified currency; anything covered by
+    # the prefetch above is served from the price cache
+    if prefetch is not None:
+        await prefetch
     prices = await get_multiple_prices(coin_ids, currency)
 
     # Get currency symbol
     currency_symbol = get_currency_symbol(currency)
 
-    prices_text = f"💰 *Multiple Cryptocurrency Prices ({currency.upper()})*\n\n"
+    prices_text = f"💰 <b>Multiple Cryptocurrency Prices ({currency.upper()})</b>\n\n"
     for i, coin_id in enumerate(coin_ids):
         price = prices.get(coin_id, "N/A")
         if price != "N/A":
-            # Format price with proper formatting
-            if price < 0.01:
-                price_display = f"{currency_symbol}{price:.6f}".rstrip('0').rstrip('.')
-            elif price < 1:
-                price_display = f"{currency_symbol}{price:.4f}".rstrip('0').rstrip('.')
-            else:
-                price_display = f"{currency_symbol}{price:,.2f}"
-            prices_text += f"• {coin_names[i]}: {price_display}\n"
+            prices_text += f"• {coin_names[i]}: {format_price(price, currency_symbol)}\n"
         else:
             prices_text += f"• {coin_names[i]}: Price unavailable\n"
 
-    await update.message.reply_text(prices_text, parse_mode='Markdown')
+    await safe_reply(update.message, prices_text, parse_mode='HTML')
 
 
-async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle inline keyboard button presses"""
-    query = update.callback_query
-    await query.answer()
+async def _cb_price(query, coin_id):
+    """Show the price card for a coin picked from an inline keyboard"""
+    coin_info = await get_coin_by_id(coin_id)
 
-    if query.data.startswith("price_"):
-        coin_id = query.data[6:]  # Remove "price_" prefix
-        coin_info = await get_coin_by_id(coin_id)
+    if not coin_info:
+        await safe_edit(query, "❌ Coin not found.")
+        return
 
-        if not coin_info:
-            await query.edit_message_text("❌ Coin not found.")
-            return
+    price_value = await fetch_price_sf(coin_id)
+    if price_value is None:
+        await safe_edit(query, "❌ Error fetching price. Please try again later.")
+        return
 
-        price_value = await get_price(coin_id)
-        if price_value is None:
-            await query.edit_message_text("❌ Error fetching price. Please try again later.")
-            return
+    price_text = PRICE_CARD_TEMPLATE.format(
+        name=escape(coin_info['name']),
+        symbol=coin_info['symbol'].upper(),
+        price=format_price(price_value),
+        coin_id=coin_info['id'],
+    )
 
-        # Format price with proper formatting
-        if price_value < 0.01:
-            # For very small prices, show more decimal places
-            price_display = f"${price_value:.6f}".rstrip('0').rstrip('.')
-        elif price_value < 1:
-            # For small prices, show 4 decimal places
-            price_display = f"${price_value:.4f}".rstrip('0').rstrip('.')
-        else:
-            # For normal prices, show 2 decimal places with commas
-            price_display = f"${price_value:,.2f}"
+    await safe_edit(query, price_text, parse_mode='HTML')
+
+
+async def _cb_add(query, coin_id):
+    """Add a coin picked from an inline keyboard to the user's alerts"""
+    coin_info = await get_coin_by_id(coin_id)
+
+    if not coin_info:
+        await safe_edit(query, "❌ Coin not found.")
+        return
 
-        price_text = (
-            f"💰 *{coin_info['name']} ({coin_info['symbol'].upper()})*\n\n"
-            f"💵 **Current Price:** {price_display}\n"
-            f"🆔 **Coin ID:** `{coin_info['id']}`"
+    # Add coin to user's subscription
+    chat_id = query.from_user.id
+    success = add_coin_to_user_subscription(chat_id, coin_id)
+
+    if success:
+        await safe_edit(query,
+            f"✅ Added <b>{escape(coin_info['name'])}</b> to your alert subscription!\n"
+            f"🪙 You will now receive alerts for {escape(coin_info['name'])}",
+            parse_mode='HTML'
+        )
+    else:
+        await safe_edit(query,
+            f"ℹ️ <b>{escape(coin_info['name'])}</b> is already in your alert subscription.",
+            parse_mode='HTML'
         )
 
-        await query.edit_message_text(price_text, parse_mode='Markdown')
 
-    elif query.data.startswith("add_"):
-        coin_id = query.data[4:]  # Remove "add_" prefix
-        coin_info = await get_coin_by_id(coin_id)
+# Callback dispatch by prefix: new button types only need a new entry here
+_CALLBACK_HANDLERS = {
+    "price": _cb_price,
+    "add": _cb_add,
+}
 
-        if not coin_info:
-            await query.edit_message_text("❌ Coin not found.")
-            return
 
-        # Add coin to user's subscription
-        chat_id = query.from_user.id
-        success = add_coin_to_user_subscription(chat_id, coin_id)
+async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle inline keyboard button presses"""
+    query = update.callback_query
+    await query.answer()
 
-        if success:
-            await query.edit_message_text(
-                f"✅ Added *{coin_info['name']}* to your alert subscription!\n"
-                f"🪙 You will now receive alerts for {coin_info['name']}",
-                parse_mode='Markdown'
-            )
-        else:
-            await query.edit_message_text(
-                f"ℹ️ *{coin_info['name']}* is already in your alert subscription.",
-                parse_mode='Markdown'
-            )
+    prefix, _, coin_id = query.data.partition("_")
+    handler = _CALLBACK_HANDLERS.get(prefix)
+    if handler:
+        await handler(query, coin_id)
 
 
 async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -433,11 +600,11 @@ async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
             threshold = float(context.args[0])
             if threshold < 0.1 or threshold > 50:
-                await update.message.reply_text(
+                await safe_reply(update.message,
                     "❌ Alert threshold must be between 0.1% and 50%.\n"
-                    "Usage: `/subscribe [threshold]`\n"
-                    "Example: `/subscribe 3.5`",
-                    parse_mode='Markdown'
+                    "Usage: <code>/subscribe [threshold]</code>\n"
+                    "Example: <code>/subscribe 3.5</code>",
+                    parse_mode='HTML'
                 )
                 return
 
@@ -446,47 +613,47 @@ async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
             if chat_id not in subscribers:
                 add_subscriber(chat_id)
-                await update.message.reply_text(
+                await safe_reply(update.message,
                     f"✅ You are now subscribed to price alerts!\n"
                     f"📊 Alert threshold: {threshold}%",
-                    parse_mode='Markdown'
+                    parse_mode='HTML'
                 )
             else:
-                await update.message.reply_text(
+                await safe_reply(update.message,
                     f"✅ Alert threshold updated!\n"
                     f"📊 New threshold: {threshold}%",
-                    parse_mode='Markdown'
+                    parse_mode='HTML'
                 )
-            print(f"✅ User {chat_id} subscribed with {threshold}% threshold")
+            log.info("✅ User %s subscribed with %s%% threshold", chat_id, threshold)
             return
 
         except ValueError:
-            await update.message.reply_text(
+            await safe_reply(update.message,
                 "❌ Invalid threshold format.\n"
-                "Usage: `/subscribe [threshold]`\n"
-                "Example: `/subscribe 3.5`",
-                parse_mode='Markdown'
+                "Usage: <code>/subscribe [threshold]</code>\n"
+                "Example: <code>/subscribe 3.5</code>",
+                parse_mode='HTML'
             )
             return
 
     # Default subscription
     if chat_id not in subscribers:
         add_subscriber(chat_id)
-        await update.message.reply_text(
+        await safe_reply(update.message,
             f"✅ You are now subscribed to price alerts!\n"
             f"📊 Default threshold: {ALERT_THRESHOLD}%\n\n"
-            f"💡 Add coins with `/addcoin <coin>` to start receiving alerts!\n"
-            f"💡 Set custom threshold with `/subscribe 2.5`",
-            parse_mode='Markdown'
+            f"💡 Add coins with <code>/addcoin &lt;coin&gt;</code> to start receiving alerts!\n"
+            f"💡 Set custom threshold with <code>/subscribe 2.5</code>",
+            parse_mode='HTML'
         )
-        print(f"✅ User {chat_id} subscribed with default threshold")
+        log.info("✅ User %s subscribed with default threshold", chat_id)
     else:
-        await update.message.reply_text(
+        await safe_reply(update.message,
             f"ℹ️ You are already subscribed to price alerts.\n"
             f"📊 Current threshold: {ALERT_THRESHOLD}%\n\n"
-            f"💡 Add coins with `/addcoin <coin>` to start receiving alerts!\n"
-            f"💡 Change threshold with `/subscribe 2.5`",
-            parse_mode='Markdown'
+            f"💡 Add coins with <code>/addcoin &lt;coin&gt;</code> to start receiving alerts!\n"
+            f"💡 Change threshold with <code>/subscribe 2.5</code>",
+            parse_mode='HTML'
         )
 
 
@@ -495,10 +662,10 @@ async def unsubscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     if chat_id in subscribers:
         remove_subscriber(chat_id)
-        await update.message.reply_text("✅ You have been unsubscribed from price alerts.")
-        print(f"❌ User {chat_id} unsubscribed")
+        await safe_reply(update.message, "✅ You have been unsubscribed from price alerts.")
+        log.info("❌ User %s unsubscribed", chat_id)
     else:
-        await update.message.reply_text("ℹ️ You were not subscribed to price alerts.")
+        await safe_reply(update.message, "ℹ️ You were not subscribed to price alerts.")
 
 
 async def settings(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -512,73 +679,71 @@ async def settings(update: Update, context: ContextTypes.DEFAULT_TYPE):
         coin_count = len(user_coins) if user_coins else 0
 
         settings_text = (
-            f"⚙️ *Your Alert Settings*\n\n"
-            f"📊 **Status:** Subscribed ✅\n"
-            f"📈 **Threshold:** {threshold}%\n"
-            f"🪙 **Monitored Coins:** {coin_count} personal coins\n\n"
-            f"💡 *Commands:*\n"
-            f"• `/addcoin <coin>` - Add coin to alerts\n"
-            f"• `/mycoins` - View your coins\n"
-            f"• `/subscribe [threshold]` - Change threshold\n"
-            f"• `/unsubscribe` - Stop alerts"
+            f"⚙️ <b>Your Alert Settings</b>\n\n"
+            f"📊 <b>Status:</b> Subscribed ✅\n"
+            f"📈 <b>Threshold:</b> {threshold}%\n"
+            f"🪙 <b>Monitored Coins:</b> {coin_count} personal coins\n\n"
+            f"💡 <b>Commands:</b>\n"
+            f"• <code>/addcoin &lt;coin&gt;</code> - Add coin to alerts\n"
+            f"• <code>/mycoins</code> - View your coins\n"
+            f"• <code>/subscribe [threshold]</code> - Change threshold\n"
+            f"• <code>/unsubscribe</code> - Stop alerts"
         )
     else:
         settings_text = (
-            f"⚙️ *Your Alert Settings*\n\n"
-            f"📊 **Status:** Not subscribed ❌\n"
-            f"📈 **Default Threshold:** {ALERT_THRESHOLD}%\n\n"
-            f"💡 *Commands:*\n"
-            f"• `/subscribe` - Subscribe to alerts\n"
-            f"• `/addcoin <coin>` - Add coin to alerts\n"
-            f"• `/mycoins` - View your coins"
+            f"⚙️ <b>Your Alert Settings</b>\n\n"
+            f"📊 <b>Status:</b> Not subscribed ❌\n"
+            f"📈 <b>Default Threshold:</b> {ALERT_THRESHOLD}%\n\n"
+            f"💡 <b>Commands:</b>\n"
+            f"• <code>/subscribe</code> - Subscribe to alerts\n"
+            f"• <code>/addcoin &lt;coin&gt;</code> - Add coin to alerts\n"
+            f"• <code>/mycoins</code> - View your coins"
         )
 
-    await update.message.reply_text(settings_text, parse_mode='Markdown')
+    await safe_reply(update.message, settings_text, parse_mode='HTML')
 
 
 async def add_coin(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Add a coin to personal alert subscription"""
     chat_id = update.effective_chat.id
     username = update.effective_user.username
-    print(f"➕ /addcoin received from {username} ({chat_id})")
+    log.info("➕ /addcoin received from %s (%s)", username, chat_id)
 
     if len(context.args) == 0:
-        await update.message.reply_text(
+        await safe_reply(update.message,
             "❌ Please provide a coin name or symbol.\n\n"
-            "Usage: `/addcoin bitcoin` or `/addcoin btc`",
-            parse_mode='Markdown'
+            "Usage: <code>/addcoin bitcoin</code> or <code>/addcoin btc</code>",
+            parse_mode='HTML'
         )
         return
 
     coin_input = ' '.join(context.args).lower()
 
     # Find the coin
-    coin_info = await get_coin_by_symbol(coin_input)
+    coin_info = await resolve_symbol_sf(coin_input)
     if not coin_info:
         search_results = await search_coins(coin_input, limit=5)
         if search_results:
             if len(search_results) > 1:
-                keyboard = []
-                for i, coin in enumerate(search_results[:5], 1):
-                    keyboard.append([InlineKeyboardButton(
+                reply_markup = InlineKeyboardMarkup([
+                    [InlineKeyboardButton(
                         f"{i}. {coin['name']} ({coin['symbol'].upper()})",
-                        callback_data=f"add_{coin['id']}"
-                    )])
-
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await update.message.reply_text(
-                    f"🔍 *Multiple coins found for: {coin_input}*\n\n"
+                        callback_data=f"add_{coin['id']}")]
+                    for i, coin in enumerate(search_results[:5], 1)
+                ])
+                await safe_reply(update.message,
+                    f"🔍 <b>Multiple coins found for: {escape(coin_input)}</b>\n\n"
                     "Please select the coin to add:",
                     reply_markup=reply_markup,
-                    parse_mode='Markdown'
+                    parse_mode='HTML'
                 )
                 return
             else:
                 coin_info = search_results[0]
         else:
-            await update.message.reply_text(
-                f"❌ No coin found with name or symbol: `{coin_input}`",
-                parse_mode='Markdown'
+            await safe_reply(update.message,
+                f"❌ No coin found with name or symbol: <code>{escape(coin_input)}</code>",
+                parse_mode='HTML'
             )
             return
 
@@ -586,16 +751,16 @@ async def add_coin(update: Update, context: ContextTypes.DEFAULT_TYPE):
     success = add_coin_to_user_subscription(chat_id, coin_info['id'])
 
     if success:
-        await update.message.reply_text(
-            f"✅ Added *{coin_info['name']} ({coin_info['symbol'].upper()})* to your alert subscription!\n"
-            f"🪙 You will now receive alerts for {coin_info['name']}\n"
-            f"🆔 **Coin ID:** `{coin_info['id']}`",
-            parse_mode='Markdown'
+        await safe_reply(update.message,
+            f"✅ Added <b>{escape(coin_info['name'])} ({coin_info['symbol'].upper()})</b> to your alert subscription!\n"
+            f"🪙 You will now receive alerts for {escape(coin_info['name'])}\n"
+            f"🆔 <b>Coin ID:</b> <code>{coin_info['id']}</code>",
+            parse_mode='HTML'
         )
     else:
-        await update.message.reply_text(
-            f"ℹ️ *{coin_info['name']} ({coin_info['symbol'].upper()})* is already in your alert subscription.",
-            parse_mode='Markdown'
+        await safe_reply(update.message,
+            f"ℹ️ <b>{escape(coin_info['name'])} ({coin_info['symbol'].upper()})</b> is already in your alert subscription.",
+            parse_mode='HTML'
         )
 
 
@@ -603,28 +768,28 @@ async def remove_coin(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Remove a coin from personal alert subscription"""
     chat_id = update.effective_chat.id
     username = update.effective_user.username
-    print(f"➖ /removecoin received from {username} ({chat_id})")
+    log.info("➖ /removecoin received from %s (%s)", username, chat_id)
 
     if len(context.args) == 0:
-        await update.message.reply_text(
+        await safe_reply(update.message,
             "❌ Please provide a coin name or symbol.\n\n"
-            "Usage: `/removecoin bitcoin` or `/removecoin btc`",
-            parse_mode='Markdown'
+            "Usage: <code>/removecoin bitcoin</code> or <code>/removecoin btc</code>",
+            parse_mode='HTML'
         )
         return
 
     coin_input = ' '.join(context.args).lower()
 
     # Find the coin
-    coin_info = await get_coin_by_symbol(coin_input)
+    coin_info = await resolve_symbol_sf(coin_input)
     if not coin_info:
         search_results = await search_coins(coin_input, limit=1)
         if search_results:
             coin_info = search_results[0]
         else:
-            await update.message.reply_text(
-                f"❌ No coin found with name or symbol: `{coin_input}`",
-                parse_mode='Markdown'
+            await safe_reply(update.message,
+                f"❌ No coin found with name or symbol: <code>{escape(coin_input)}</code>",
+                parse_mode='HTML'
             )
             return
 
@@ -632,14 +797,14 @@ async def remove_coin(update: Update, context: ContextTypes.DEFAULT_TYPE):
     success = remove_coin_from_user_subscription(chat_id, coin_info['id'])
 
     if success:
-        await update.message.reply_text(
-            f"✅ Removed *{coin_info['name']}* from your alert subscription!",
-            parse_mode='Markdown'
+        await safe_reply(update.message,
+            f"✅ Removed <b>{escape(coin_info['name'])}</b> from your alert subscription!",
+            parse_mode='HTML'
         )
     else:
-        await update.message.reply_text(
-            f"ℹ️ *{coin_info['name']}* was not in your alert subscription.",
-            parse_mode='Markdown'
+        await safe_reply(update.message,
+            f"ℹ️ <b>{escape(coin_info['name'])}</b> was not in your alert subscription.",
+            parse_mode='HTML'
         )
 
 
@@ -647,27 +812,28 @@ async def my_coins(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show user's personal coin subscriptions"""
     chat_id = update.effective_chat.id
     username = update.effective_user.username
-    print(f"📋 /mycoins received from {username} ({chat_id})")
+    log.info("📋 /mycoins received from %s (%s)", username, chat_id)
 
     user_coins = get_user_monitored_coins(chat_id)
 
     if not user_coins:
-        await update.message.reply_text(
-            "📋 *Your Coin Subscriptions*\n\n"
+        await safe_reply(update.message,
+            "📋 <b>Your Coin Subscriptions</b>\n\n"
             "You are not subscribed to any coins.\n"
             "No alerts will be sent until you add coins.\n\n"
-            "💡 Use `/addcoin <coin>` to add specific coins!\n"
-            "💡 Use `/subscribe` to enable alerts",
-            parse_mode='Markdown'
+            "💡 Use <code>/addcoin &lt;coin&gt;</code> to add specific coins!\n"
+            "💡 Use <code>/subscribe</code> to enable alerts",
+            parse_mode='HTML'
         )
         return
 
-    # Get coin names
+    # Get coin names with one bulk lookup instead of a call per coin
+    coin_infos = await get_multiple_coins(user_coins)
     coin_names = []
     for coin_id in user_coins:
-        coin_info = await get_coin_by_id(coin_id)
+        coin_info = coin_infos.get(coin_id)
         if coin_info:
-            coin_names.append(f"• {coin_info['name']} ({coin_info['symbol'].upper()})")
+            coin_names.append(f"• {escape(coin_info['name'])} ({coin_info['symbol'].upper()})")
         else:
             coin_names.append(f"• {coin_id}")
 
@@ -675,14 +841,14 @@ async def my_coins(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if len(coin_names) > 20:
         coins_text += f"\n... and {len(coin_names) - 20} more coins"
 
-    await update.message.reply_text(
-        f"📋 *Your Coin Subscriptions* ({len(user_coins)} coins)\n\n"
+    await safe_reply(update.message,
+        f"📋 <b>Your Coin Subscriptions</b> ({len(user_coins)} coins)\n\n"
         f"{coins_text}\n\n"
-        f"💡 *Commands:*\n"
-        f"• `/addcoin <coin>` - Add a coin\n"
-        f"• `/removecoin <coin>` - Remove a coin\n"
-        f"• `/clearcoins` - Clear all subscriptions",
-        parse_mode='Markdown'
+        f"💡 <b>Commands:</b>\n"
+        f"• <code>/addcoin &lt;coin&gt;</code> - Add a coin\n"
+        f"• <code>/removecoin &lt;coin&gt;</code> - Remove a coin\n"
+        f"• <code>/clearcoins</code> - Clear all subscriptions",
+        parse_mode='HTML'
     )
 
 
@@ -693,15 +859,15 @@ async def clear_coins(update: Update, context: ContextTypes.DEFAULT_TYPE):
     success = clear_user_coin_subscriptions(chat_id)
 
     if success:
-        await update.message.reply_text(
+        await safe_reply(update.message,
             "✅ Cleared all your personal coin subscriptions!\n"
             "No alerts will be sent until you add coins again.",
-            parse_mode='Markdown'
+            parse_mode='HTML'
         )
     else:
-        await update.message.reply_text(
+        await safe_reply(update.message,
             "ℹ️ You had no personal coin subscriptions to clear.",
-            parse_mode='Markdown'
+            parse_mode='HTML'
         )
 
 
@@ -709,37 +875,36 @@ async def backup_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Create data backup (admin only)"""
     chat_id = update.effective_chat.id
     username = update.effective_user.username
-    print(f"💾 /backup received from {username} ({chat_id})")
+    log.info("💾 /backup received from %s (%s)", username, chat_id)
 
-    # Simple admin check - you can modify this
-    if chat_id not in [123456789]:  # Replace with your admin chat_id
-        await update.message.reply_text("❌ This command is for administrators only.")
+    if chat_id not in ADMIN_IDS:
+        await safe_reply(update.message, "❌ This command is for administrators only.")
         return
 
     storage = get_storage()
     success = storage.backup_data()
 
     if success:
-        await update.message.reply_text("✅ Data backup created successfully!")
+        await safe_reply(update.message, "✅ Data backup created successfully!")
     else:
-        await update.message.reply_text("❌ Failed to create backup.")
+        await safe_reply(update.message, "❌ Failed to create backup.")
 
 
 async def restore_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Restore data from backup (admin only)"""
     chat_id = update.effective_chat.id
     username = update.effective_user.username
-    print(f"🔄 /restore received from {username} ({chat_id})")
+    log.info("🔄 /restore received from %s (%s)", username, chat_id)
 
-    if chat_id not in [123456789]:  # Replace with your admin chat_id
-        await update.message.reply_text("❌ This command is for administrators only.")
+    if chat_id not in ADMIN_IDS:
+        await safe_reply(update.message, "❌ This command is for administrators only.")
         return
 
     if len(context.args) == 0:
-        await update.message.reply_text(
+        await safe_reply(update.message,
             "❌ Please provide backup file path.\n\n"
-            "Usage: `/restore backup_20231201_120000.json`",
-            parse_mode='Markdown'
+            "Usage: <code>/restore backup_20231201_120000.json</code>",
+            parse_mode='HTML'
         )
         return
 
@@ -748,14 +913,36 @@ async def restore_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
     success = storage.restore_data(backup_path)
 
     if success:
-        await update.message.reply_text("✅ Data restored successfully!")
+        await safe_reply(update.message, "✅ Data restored successfully!")
     else:
-        await update.message.reply_text("❌ Failed to restore data.")
+        await safe_reply(update.message, "❌ Failed to restore data.")
+
+
+async def _post_init(app):
+    """Start the alert loop on the bot's own event loop once it is ready"""
+    asyncio.create_task(start_alerts_async(app.bot))
+    # JSON storage confines its disk writes to a single loop task; the
+    # SQLite and Redis backends manage their own writes
+    storage = get_storage()
+    if hasattr(storage, "run_writer"):
+        asyncio.create_task(storage.run_writer())
+
+
+async def _post_shutdown(app):
+    """Flush pending state and close the shared HTTP client on shutdown"""
+    await flush_dirty()
+    await close_client()
 
 
 def run_telegram_bot():
     """Start the Telegram bot"""
-    app = ApplicationBuilder().token(API_TOKEN).build()
+    _setup_logging()
+
+    # Process updates concurrently: the handlers are thin async wrappers
+    # around API calls, so serial dispatch would leave them waiting on I/O
+    app = (ApplicationBuilder().token(API_TOKEN)
+           .concurrent_updates(True)
+           .post_init(_post_init).post_shutdown(_post_shutdown).build())
 
     # Add command handlers
     app.add_handler(CommandHandler("start", start))
@@ -778,17 +965,7 @@ def run_telegram_bot():
     # Add callback query handler for inline keyboards
     app.add_handler(CallbackQueryHandler(button_callback))
 
-    print("🤖 Telegram bot starting...")
-
-    # Start price alerts in a separate thread after app is created
-    def start_alerts_wrapper():
-        # Wait a moment for the app to initialize
-        import time
-        time.sleep(2)
-        # Run alerts in a new event loop
-        asyncio.run(start_alerts_async(app.bot))
-
-    threading.Thread(target=start_alerts_wrapper, daemon=True).start()
+    log.info("🤖 Telegram bot starting...")
 
     app.run_polling()
 
@@ -1,147 +1,328 @@
+import asyncio
+import atexit
 import json
+import logging
+import mmap
 import os
+import sqlite3
+import time
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-import threading
+
+# orjson encodes/decodes the state file several times faster than the
+# stdlib json; fall back to the stdlib if it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Resolve storage configuration once at import time; get_storage() used
+# to re-import these from config on every call
+try:
+    from config import STORAGE_BACKEND
+except ImportError:
+    STORAGE_BACKEND = "json"
+
+try:
+    from config import STORAGE_PATH
+except ImportError:
+    STORAGE_PATH = "user_data"
+
+try:
+    from config import REDIS_URL
+except ImportError:
+    REDIS_URL = "redis://localhost:6379/0"
 
 
 class UserStorage:
-    """Persistent storage for user data using JSON files"""
+    """Persistent storage for user data using JSON files
+
+    State is parsed once and held in memory. Mutations apply in place,
+    mark their section dirty and signal the writer task, which owns
+    every disk write: with all access confined to the bot's event loop
+    there is nothing to lock. Reads serve straight from memory.
+    """
+
+    # How long the writer task lets a burst of mutations accumulate
+    # before writing, so e.g. a restore produces one write per section
+    _BATCH_WINDOW = 0.1
+
+    # Compact the append-only price log into the JSON snapshot once this
+    # many entries have been appended since the last snapshot
+    _COMPACT_AFTER = 1000
+
+    # Each state section lives in its own file, so a mutation only ever
+    # rewrites the section it touched instead of the whole state
+    _SECTION_FILES = {
+        "subscribers": "subscribers",
+        "user_alert_thresholds": "thresholds",
+        "user_coin_subscriptions": "subscriptions",
+        "last_prices": "last_prices",
+    }
 
     def __init__(self, storage_path: str = "user_data"):
         """Initialize JSON storage with specified path"""
         self.storage_path = storage_path
-        self.lock = threading.Lock()
+        # Set once run_writer() is consuming; until then (startup,
+        # one-off scripts) mutations write through synchronously
+        self._q = None
+        # Reused across writes so steady-state flushes don't allocate a
+        # fresh buffer each time; the bytearray keeps its capacity
+        self._enc_buf = bytearray()
         self._init_json_storage()
 
+    async def run_writer(self):
+        """Own all disk writes from a single event-loop task
+
+        While this task runs, mutators only mark sections dirty and
+        drop a signal on the queue; the writes happen here, serial by
+        construction. Signals are drained in _BATCH_WINDOW batches so
+        a burst of mutations still produces one write per section.
+        """
+        self._q = asyncio.Queue()
+        try:
+            while True:
+                await self._q.get()
+                # Let the rest of a burst arrive before writing
+                await asyncio.sleep(self._BATCH_WINDOW)
+                while not self._q.empty():
+                    self._q.get_nowait()
+                self._flush()
+        except asyncio.CancelledError:
+            self._q = None
+            self._flush()
+            raise
+
     def _init_json_storage(self):
         """Initialize JSON storage"""
         self.json_file = f"{self.storage_path}.json"
-        self._ensure_json_file_exists()
-
-    def _ensure_json_file_exists(self):
-        """Create JSON file if it doesn't exist"""
-        if not os.path.exists(self.json_file):
-            default_data = {
-                "subscribers": [],
-                "user_alert_thresholds": {},
-                "user_coin_subscriptions": {},
-                "last_prices": {},
-                "metadata": {
-                    "created_at": datetime.now().isoformat(),
-                    "last_updated": datetime.now().isoformat()
-                }
+        self.section_files = {
+            section: f"{self.storage_path}_{suffix}.json"
+            for section, suffix in self._SECTION_FILES.items()
+        }
+        self.meta_file = f"{self.storage_path}_meta.json"
+        # Dirty sections since the last flush; only these get rewritten
+        self._dirty = set()
+        self._last_flush = time.time()
+
+        if any(os.path.exists(p) for p in self.section_files.values()):
+            self._data = {
+                section: self._read_json_file(path, default)
+                for (section, path), default in zip(
+                    self.section_files.items(), ([], {}, {}, {}))
             }
-            with open(self.json_file, 'w', encoding='utf-8') as f:
-                json.dump(default_data, f, indent=2, ensure_ascii=False)
+            self._data["metadata"] = self._read_json_file(self.meta_file, {})
+        elif os.path.exists(self.json_file):
+            # One-time migration from the old combined state file
+            self._data = self._read_json_file(self.json_file, {})
+            self._dirty.update(self._SECTION_FILES)
+        else:
+            self._data = {}
+            self._dirty.update(self._SECTION_FILES)
+
+        self._data.setdefault("subscribers", [])
+        self._data.setdefault("last_prices", {})
+        self._data.setdefault("metadata", {
+            "created_at": datetime.now().isoformat(),
+            "last_updated": datetime.now().isoformat()
+        })
+        # Canonical in-memory state is keyed by int chat_id; keys are
+        # stringified once per flush instead of converted on every call
+        self._data["user_alert_thresholds"] = {
+            int(k): v for k, v in self._data.get("user_alert_thresholds", {}).items()
+        }
+        # Coin subscriptions are sets in memory: add/remove/containment
+        # are O(1) instead of scanning a list; serialized sorted
+        self._data["user_coin_subscriptions"] = {
+            int(k): set(v) for k, v in self._data.get("user_coin_subscriptions", {}).items()
+        }
+        # Price updates go to an append-only log between snapshots, so an
+        # alert cycle writes a few changed lines instead of the whole file
+        self.prices_log = f"{self.storage_path}_prices.ndjson"
+        self._log_entries = 0
+        self._migrate_legacy_price_log()
+        self._replay_prices_log()
+        if self._dirty:
+            self._flush()
+        atexit.register(self._flush)
+
+    # Parse cache keyed by path: (mtime_ns, parsed data). Re-reading a
+    # file that hasn't changed (a second storage instance at boot, a
+    # repeated restore from the same backup) skips the decode entirely
+    _PARSE_CACHE: Dict[str, tuple] = {}
+
+    def _read_json_file(self, path: str, default: Any) -> Any:
+        """Parse one JSON file via mmap, returning default if it's missing
+
+        mmap lets the decoder read straight out of the page cache instead
+        of copying the whole file into a Python buffer first.
+        """
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return default
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._PARSE_CACHE.get(path)
+        if cached is not None and cached[0] == mtime:
+            data = cached[1]
+        else:
+            with open(path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if orjson is not None:
+                        data = orjson.loads(memoryview(mm))
+                    else:
+                        data = json.loads(mm[:])
+            self._PARSE_CACHE[path] = (mtime, data)
+        # Hand out a shallow copy so callers can mutate their view
+        # without poisoning the cached parse
+        return data.copy() if isinstance(data, (dict, list)) else data
+
+    def _migrate_legacy_price_log(self):
+        """Fold the old tab-separated price log into the next snapshot"""
+        legacy = f"{self.storage_path}_prices.log"
+        if not os.path.exists(legacy):
+            return
+        try:
+            with open(legacy, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        coin_id, price = line.rstrip('\n').split('\t')
+                        self._data["last_prices"][coin_id] = float(price)
+                    except ValueError:
+                        continue
+            os.remove(legacy)
+            self._dirty.add("last_prices")
+        except Exception as e:
+            logger.warning("Error migrating price log: %s", e)
+
+    def _replay_prices_log(self):
+        """Apply price updates appended since the last snapshot"""
+        if not os.path.exists(self.prices_log):
+            return
+        try:
+            loads = orjson.loads if orjson is not None else json.loads
+            with open(self.prices_log, 'rb') as f:
+                for line in f:
+                    try:
+                        record = loads(line)
+                        self._data["last_prices"][record["c"]] = record["p"]
+                        self._log_entries += 1
+                    except (ValueError, KeyError):
+                        continue  # torn trailing write from a crash
+        except Exception as e:
+            logger.warning("Error replaying price log: %s", e)
 
     def save_subscribers(self, subscribers: List[int]) -> bool:
         """Save subscribers list"""
-        with self.lock:
-            try:
-                return self._save_subscribers_json(subscribers)
-            except Exception as e:
-                print(f"Error saving subscribers: {e}")
-                return False
+        try:
+            return self._save_subscribers_json(subscribers)
+        except Exception as e:
+            logger.warning("Error saving subscribers: %s", e)
+            return False
 
     def load_subscribers(self) -> List[int]:
         """Load subscribers list"""
-        with self.lock:
-            try:
-                return self._load_subscribers_json()
-            except Exception as e:
-                print(f"Error loading subscribers: {e}")
-                return []
+        try:
+            return self._load_subscribers_json()
+        except Exception as e:
+            logger.warning("Error loading subscribers: %s", e)
+            return []
 
     def save_user_threshold(self, chat_id: int, threshold: float) -> bool:
         """Save user alert threshold"""
-        with self.lock:
-            try:
-                return self._save_user_threshold_json(chat_id, threshold)
-            except Exception as e:
-                print(f"Error saving threshold for user {chat_id}: {e}")
-                return False
+        try:
+            return self._save_user_threshold_json(chat_id, threshold)
+        except Exception as e:
+            logger.warning("Error saving threshold for user %s: %s", chat_id, e)
+            return False
+
+    def delete_user_threshold(self, chat_id: int) -> bool:
+        """Delete user alert threshold"""
+        try:
+            return self._delete_user_threshold_json(chat_id)
+        except Exception as e:
+            logger.warning("Error deleting threshold for user %s: %s", chat_id, e)
+            return False
 
     def load_user_thresholds(self) -> Dict[int, float]:
         """Load user alert thresholds"""
-        with self.lock:
-            try:
-                return self._load_user_thresholds_json()
-            except Exception as e:
-                print(f"Error loading user thresholds: {e}")
-                return {}
+        try:
+            return self._load_user_thresholds_json()
+        except Exception as e:
+            logger.warning("Error loading user thresholds: %s", e)
+            return {}
 
     def save_user_coin_subscriptions(self, chat_id: int, coin_ids: List[str]) -> bool:
         """Save user coin subscriptions"""
-        with self.lock:
-            try:
-                return self._save_user_coin_subscriptions_json(chat_id, coin_ids)
-            except Exception as e:
-                print(f"Error saving coin subscriptions for user {chat_id}: {e}")
-                return False
+        try:
+            return self._save_user_coin_subscriptions_json(chat_id, coin_ids)
+        except Exception as e:
+            logger.warning("Error saving coin subscriptions for user %s: %s", chat_id, e)
+            return False
+
+    def delete_user_coin_subscriptions(self, chat_id: int) -> bool:
+        """Delete user coin subscriptions"""
+        try:
+            return self._delete_user_coin_subscriptions_json(chat_id)
+        except Exception as e:
+            logger.warning("Error deleting coin subscriptions for user %s: %s", chat_id, e)
+            return False
 
     def load_user_coin_subscriptions(self) -> Dict[int, List[str]]:
         """Load user coin subscriptions"""
-        with self.lock:
-            try:
-                return self._load_user_coin_subscriptions_json()
-            except Exception as e:
-                print(f"Error loading coin subscriptions: {e}")
-                return {}
+        try:
+            return self._load_user_coin_subscriptions_json()
+        except Exception as e:
+            logger.warning("Error loading coin subscriptions: %s", e)
+            return {}
 
     def save_last_prices(self, last_prices: Dict[str, float]) -> bool:
         """Save last prices"""
-        with self.lock:
-            try:
-                return self._save_last_prices_json(last_prices)
-            except Exception as e:
-                print(f"Error saving last prices: {e}")
-                return False
+        try:
+            return self._save_last_prices_json(last_prices)
+        except Exception as e:
+            logger.warning("Error saving last prices: %s", e)
+            return False
 
     def load_last_prices(self) -> Dict[str, float]:
         """Load last prices"""
-        with self.lock:
-            try:
-                return self._load_last_prices_json()
-            except Exception as e:
-                print(f"Error loading last prices: {e}")
-                return {}
+        try:
+            return self._load_last_prices_json()
+        except Exception as e:
+            logger.warning("Error loading last prices: %s", e)
+            return {}
 
     def add_coin_to_user(self, chat_id: int, coin_id: str) -> bool:
         """Add coin to user"""
-        with self.lock:
-            try:
-                return self._add_coin_to_user_json(chat_id, coin_id)
-            except Exception as e:
-                print(f"Error adding coin {coin_id} to user {chat_id}: {e}")
-                return False
+        try:
+            return self._add_coin_to_user_json(chat_id, coin_id)
+        except Exception as e:
+            logger.warning("Error adding coin %s to user %s: %s", coin_id, chat_id, e)
+            return False
 
     def remove_coin_from_user(self, chat_id: int, coin_id: str) -> bool:
         """Remove coin from user"""
-        with self.lock:
-            try:
-                return self._remove_coin_from_user_json(chat_id, coin_id)
-            except Exception as e:
-                print(f"Error removing coin {coin_id} from user {chat_id}: {e}")
-                return False
+        try:
+            return self._remove_coin_from_user_json(chat_id, coin_id)
+        except Exception as e:
+            logger.warning("Error removing coin %s from user %s: %s", coin_id, chat_id, e)
+            return False
 
     def clear_user_coins(self, chat_id: int) -> bool:
         """Clear all user coins"""
-        with self.lock:
-            try:
-                return self._clear_user_coins_json(chat_id)
-            except Exception as e:
-                print(f"Error clearing coins for user {chat_id}: {e}")
-                return False
+        try:
+            return self._clear_user_coins_json(chat_id)
+        except Exception as e:
+            logger.warning("Error clearing coins for user %s: %s", chat_id, e)
+            return False
 
     def get_user_coins(self, chat_id: int) -> List[str]:
         """Get user coins"""
-        with self.lock:
-            try:
-                return self._get_user_coins_json(chat_id)
-            except Exception as e:
-                print(f"Error getting coins for user {chat_id}: {e}")
-                return []
+        try:
+            return self._get_user_coins_json(chat_id)
+        except Exception as e:
+            logger.warning("Error getting coins for user %s: %s", chat_id, e)
+            return []
 
     def backup_data(self, backup_path: str = None) -> bool:
         """Create data backup"""
@@ -150,37 +331,51 @@ class UserStorage:
             backup_path = f"backup_{timestamp}.json"
 
         try:
-            import shutil
-            shutil.copy2(self.json_file, backup_path)
+            # Export every section into one combined file so backups keep
+            # the original (and restore-compatible) format
+            self._flush()
+            data = {section: self._serialize_section(section)
+                    for section in self._SECTION_FILES}
+            data["metadata"] = self._data["metadata"]
+            self._write_json_file(backup_path, data, indent=True)
             return True
         except Exception as e:
-            print(f"Error creating backup: {e}")
+            logger.warning("Error creating backup: %s", e)
             return False
 
     def restore_data(self, backup_path: str) -> bool:
         """Restore data from backup"""
         try:
-            with open(backup_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            backup = self._read_json_file(backup_path, None)
+            if backup is None:
+                logger.warning("Backup file not found: %s", backup_path)
+                return False
 
-            self.save_subscribers(data.get("subscribers", []))
-            for chat_id, threshold in data.get("user_alert_thresholds", {}).items():
-                self.save_user_threshold(int(chat_id), threshold)
-            for chat_id, coin_ids in data.get("user_coin_subscriptions", {}).items():
-                self.save_user_coin_subscriptions(int(chat_id), coin_ids)
-            self.save_last_prices(data.get("last_prices", {}))
+            # Swap the whole state in at once and flush a single write,
+            # rather than one save (and one rewrite) per record
+            self._data["subscribers"] = backup.get("subscribers", [])
+            self._data["user_alert_thresholds"] = {
+                int(k): v for k, v in backup.get("user_alert_thresholds", {}).items()
+            }
+            self._data["user_coin_subscriptions"] = {
+                int(k): set(v) for k, v in backup.get("user_coin_subscriptions", {}).items()
+            }
+            self._data["last_prices"] = backup.get("last_prices", {})
+            self._dirty.update(self._SECTION_FILES)
+            self._flush()
 
             return True
         except Exception as e:
-            print(f"Error restoring data: {e}")
+            logger.warning("Error restoring data: %s", e)
             return False
 
     # JSON methods
     def _save_subscribers_json(self, subscribers: List[int]) -> bool:
         data = self._load_json_data()
+        if data["subscribers"] == subscribers:
+            return True
         data["subscribers"] = subscribers
-        data["metadata"]["last_updated"] = datetime.now().isoformat()
-        return self._save_json_data(data)
+        return self._save_json_data("subscribers")
 
     def _load_subscribers_json(self) -> List[int]:
         data = self._load_json_data()
@@ -188,29 +383,61 @@ class UserStorage:
 
     def _save_user_threshold_json(self, chat_id: int, threshold: float) -> bool:
         data = self._load_json_data()
-        data["user_alert_thresholds"][str(chat_id)] = threshold
-        data["metadata"]["last_updated"] = datetime.now().isoformat()
-        return self._save_json_data(data)
+        if data["user_alert_thresholds"].get(chat_id) == threshold:
+            return True
+        data["user_alert_thresholds"][chat_id] = threshold
+        return self._save_json_data("user_alert_thresholds")
+
+    def _delete_user_threshold_json(self, chat_id: int) -> bool:
+        data = self._load_json_data()
+        if data["user_alert_thresholds"].pop(chat_id, None) is not None:
+            return self._save_json_data("user_alert_thresholds")
+        return False
 
     def _load_user_thresholds_json(self) -> Dict[int, float]:
         data = self._load_json_data()
-        return {int(k): v for k, v in data.get("user_alert_thresholds", {}).items()}
+        return dict(data.get("user_alert_thresholds", {}))
 
     def _save_user_coin_subscriptions_json(self, chat_id: int, coin_ids: List[str]) -> bool:
         data = self._load_json_data()
-        data["user_coin_subscriptions"][str(chat_id)] = coin_ids
-        data["metadata"]["last_updated"] = datetime.now().isoformat()
-        return self._save_json_data(data)
+        coins = set(coin_ids)
+        if data["user_coin_subscriptions"].get(chat_id) == coins:
+            return True
+        data["user_coin_subscriptions"][chat_id] = coins
+        return self._save_json_data("user_coin_subscriptions")
+
+    def _delete_user_coin_subscriptions_json(self, chat_id: int) -> bool:
+        data = self._load_json_data()
+        if data["user_coin_subscriptions"].pop(chat_id, None) is not None:
+            return self._save_json_data("user_coin_subscriptions")
+        return False
 
     def _load_user_coin_subscriptions_json(self) -> Dict[int, List[str]]:
         data = self._load_json_data()
-        return {int(k): v for k, v in data.get("user_coin_subscriptions", {}).items()}
+        return {k: sorted(v) for k, v in data.get("user_coin_subscriptions", {}).items()}
 
     def _save_last_prices_json(self, last_prices: Dict[str, float]) -> bool:
         data = self._load_json_data()
-        data["last_prices"] = last_prices
-        data["metadata"]["last_updated"] = datetime.now().isoformat()
-        return self._save_json_data(data)
+        current = data["last_prices"]
+        changed = [(c, p) for c, p in last_prices.items() if current.get(c) != p]
+        shrunk = len(last_prices) < len(current)
+        # Append only the changed entries; the full dict is rewritten only
+        # when the log is compacted into the next snapshot
+        if changed:
+            if orjson is not None:
+                records = [orjson.dumps({"c": coin_id, "p": price}) + b'\n'
+                           for coin_id, price in changed]
+            else:
+                records = [json.dumps({"c": coin_id, "p": price},
+                                      separators=(',', ':')).encode('utf-8') + b'\n'
+                           for coin_id, price in changed]
+            with open(self.prices_log, 'ab') as f:
+                f.writelines(records)
+            self._log_entries += len(changed)
+        data["last_prices"] = dict(last_prices)
+        if shrunk or self._log_entries >= self._COMPACT_AFTER:
+            return self._save_json_data("last_prices")
+        return True
 
     def _load_last_prices_json(self) -> Dict[str, float]:
         data = self._load_json_data()
@@ -218,46 +445,511 @@ class UserStorage:
 
     def _add_coin_to_user_json(self, chat_id: int, coin_id: str) -> bool:
         data = self._load_json_data()
-        chat_id_str = str(chat_id)
-        if chat_id_str not in data["user_coin_subscriptions"]:
-            data["user_coin_subscriptions"][chat_id_str] = []
-        if coin_id not in data["user_coin_subscriptions"][chat_id_str]:
-            data["user_coin_subscriptions"][chat_id_str].append(coin_id)
-            data["metadata"]["last_updated"] = datetime.now().isoformat()
-            return self._save_json_data(data)
+        coins = data["user_coin_subscriptions"].setdefault(chat_id, set())
+        if coin_id not in coins:
+            coins.add(coin_id)
+            return self._save_json_data("user_coin_subscriptions")
         return False
 
     def _remove_coin_from_user_json(self, chat_id: int, coin_id: str) -> bool:
         data = self._load_json_data()
-        chat_id_str = str(chat_id)
-        if chat_id_str in data["user_coin_subscriptions"] and coin_id in data["user_coin_subscriptions"][chat_id_str]:
-            data["user_coin_subscriptions"][chat_id_str].remove(coin_id)
-            data["metadata"]["last_updated"] = datetime.now().isoformat()
-            return self._save_json_data(data)
+        if coin_id in data["user_coin_subscriptions"].get(chat_id, ()):
+            data["user_coin_subscriptions"][chat_id].discard(coin_id)
+            return self._save_json_data("user_coin_subscriptions")
         return False
 
     def _clear_user_coins_json(self, chat_id: int) -> bool:
         data = self._load_json_data()
-        chat_id_str = str(chat_id)
-        if chat_id_str in data["user_coin_subscriptions"]:
-            data["user_coin_subscriptions"][chat_id_str] = []
-            data["metadata"]["last_updated"] = datetime.now().isoformat()
-            return self._save_json_data(data)
+        if chat_id in data["user_coin_subscriptions"]:
+            data["user_coin_subscriptions"][chat_id] = set()
+            return self._save_json_data("user_coin_subscriptions")
         return False
 
     def _get_user_coins_json(self, chat_id: int) -> List[str]:
         data = self._load_json_data()
-        return data.get("user_coin_subscriptions", {}).get(str(chat_id), [])
+        return sorted(data.get("user_coin_subscriptions", {}).get(chat_id, ()))
 
     def _load_json_data(self) -> Dict[str, Any]:
-        with open(self.json_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-
-    def _save_json_data(self, data: Dict[str, Any]) -> bool:
-        with open(self.json_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        return self._data
+
+    def _save_json_data(self, section: str) -> bool:
+        # Mutations happen on self._data in place; mark the touched
+        # section dirty and signal the writer task, which batches the
+        # actual disk writes
+        self._dirty.add(section)
+        if self._q is not None:
+            self._q.put_nowait(section)
+        else:
+            self._flush()
         return True
 
+    def _serialize_section(self, section: str) -> Any:
+        """Build the JSON form of one section, stringifying int keys"""
+        if section == "user_alert_thresholds":
+            return {str(k): v for k, v in self._data[section].items()}
+        if section == "user_coin_subscriptions":
+            return {str(k): sorted(v) for k, v in self._data[section].items()}
+        return self._data[section]
+
+    def _write_json_file(self, path: str, data: Any, indent: bool = False):
+        """Serialize and write one JSON file in a single syscall
+
+        State files are written compact: no indentation and no spaces
+        after separators, which shrinks the output (and the encode work)
+        noticeably once sections hold thousands of entries. Backups keep
+        indentation since people actually open those.
+        """
+        buf = self._enc_buf
+        buf.clear()
+        if orjson is not None:
+            option = orjson.OPT_INDENT_2 if indent else 0
+            buf.extend(orjson.dumps(data, option=option))
+        elif indent:
+            buf.extend(json.dumps(data, indent=2,
+                                  ensure_ascii=False).encode('utf-8'))
+        else:
+            buf.extend(json.dumps(data, separators=(',', ':'),
+                                  ensure_ascii=False).encode('utf-8'))
+        # Write to a sibling temp file and atomically swap it in, so a
+        # crash mid-write can never leave a truncated state file behind
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(buf)
+        os.replace(tmp_path, path)
+
+    def _flush(self):
+        """Write dirty sections of the in-memory state to disk"""
+        if not self._dirty:
+            return
+        try:
+            # Stamp once per actual disk write, not per mutation: the
+            # isoformat round-trip is wasted work for writes that get
+            # batched away by the writer
+            self._data["metadata"]["last_updated"] = datetime.now().isoformat()
+            for section in self._dirty:
+                self._write_json_file(self.section_files[section],
+                                      self._serialize_section(section))
+            self._write_json_file(self.meta_file, self._data["metadata"])
+            if "last_prices" in self._dirty:
+                # The snapshot now contains the latest prices; start
+                # the append-only log over
+                open(self.prices_log, 'w').close()
+                self._log_entries = 0
+            self._dirty.clear()
+            self._last_flush = time.time()
+        except Exception as e:
+            logger.warning("Error flushing storage: %s", e)
+
+
+class SQLiteStorage:
+    """Persistent storage for user data using SQLite
+
+    Implements the same interface as UserStorage with single indexed
+    UPSERT/DELETE statements per mutation instead of re-serializing the
+    whole state file. WAL mode lets readers proceed during writes, and
+    SQLite's own locking replaces the Python-side mutex.
+    """
+
+    def __init__(self, storage_path: str = "user_data"):
+        """Initialize SQLite storage with specified path"""
+        self.db_path = f"{storage_path}.db"
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_tables()
+
+    def _init_tables(self):
+        """Create tables if they don't exist"""
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS subscribers (
+                chat_id INTEGER PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS user_thresholds (
+                chat_id INTEGER PRIMARY KEY,
+                threshold REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS user_coin_subs (
+                chat_id INTEGER NOT NULL,
+                coin_id TEXT NOT NULL,
+                PRIMARY KEY (chat_id, coin_id)
+            );
+            CREATE TABLE IF NOT EXISTS last_prices (
+                coin_id TEXT PRIMARY KEY,
+                price REAL NOT NULL
+            );
+        """)
+
+    def save_subscribers(self, subscribers: List[int]) -> bool:
+        """Save subscribers list"""
+        try:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM subscribers")
+            self.conn.executemany("INSERT INTO subscribers VALUES (?)",
+                                  [(chat_id,) for chat_id in subscribers])
+            self.conn.execute("COMMIT")
+            return True
+        except Exception as e:
+            try:
+                self.conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass  # BEGIN itself failed; no transaction to roll back
+            logger.warning("Error saving subscribers: %s", e)
+            return False
+
+    def load_subscribers(self) -> List[int]:
+        """Load subscribers list"""
+        try:
+            rows = self.conn.execute("SELECT chat_id FROM subscribers ORDER BY chat_id")
+            return [row[0] for row in rows]
+        except Exception as e:
+            logger.warning("Error loading subscribers: %s", e)
+            return []
+
+    def save_user_threshold(self, chat_id: int, threshold: float) -> bool:
+        """Save user alert threshold"""
+        try:
+            self.conn.execute("INSERT OR REPLACE INTO user_thresholds VALUES (?, ?)",
+                              (chat_id, threshold))
+            return True
+        except Exception as e:
+            logger.warning("Error saving threshold for user %s: %s", chat_id, e)
+            return False
+
+    def delete_user_threshold(self, chat_id: int) -> bool:
+        """Delete user alert threshold"""
+        try:
+            cursor = self.conn.execute("DELETE FROM user_thresholds WHERE chat_id = ?",
+                                       (chat_id,))
+            return cursor.rowcount > 0
+        except Exception as e:
+            logger.warning("Error deleting threshold for user %s: %s", chat_id, e)
+            return False
+
+    def load_user_thresholds(self) -> Dict[int, float]:
+        """Load user alert thresholds"""
+        try:
+            rows = self.conn.execute("SELECT chat_id, threshold FROM user_thresholds")
+            return dict(rows)
+        except Exception as e:
+            logger.warning("Error loading user thresholds: %s", e)
+            return {}
+
+    def save_user_coin_subscriptions(self, chat_id: int, coin_ids: List[str]) -> bool:
+        """Save user coin subscriptions"""
+        try:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM user_coin_subs WHERE chat_id = ?", (chat_id,))
+            self.conn.executemany("INSERT INTO user_coin_subs VALUES (?, ?)",
+                                  [(chat_id, coin_id) for coin_id in coin_ids])
+            self.conn.execute("COMMIT")
+            return True
+        except Exception as e:
+            try:
+                self.conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass  # BEGIN itself failed; no transaction to roll back
+            logger.warning("Error saving coin subscriptions for user %s: %s", chat_id, e)
+            return False
+
+    def delete_user_coin_subscriptions(self, chat_id: int) -> bool:
+        """Delete user coin subscriptions"""
+        try:
+            cursor = self.conn.execute("DELETE FROM user_coin_subs WHERE chat_id = ?",
+                                       (chat_id,))
+            return cursor.rowcount > 0
+        except Exception as e:
+            logger.warning("Error deleting coin subscriptions for user %s: %s", chat_id, e)
+            return False
+
+    def load_user_coin_subscriptions(self) -> Dict[int, List[str]]:
+        """Load user coin subscriptions"""
+        try:
+            result = {}
+            rows = self.conn.execute(
+                "SELECT chat_id, coin_id FROM user_coin_subs ORDER BY chat_id, coin_id")
+            for chat_id, coin_id in rows:
+                result.setdefault(chat_id, []).append(coin_id)
+            return result
+        except Exception as e:
+            logger.warning("Error loading coin subscriptions: %s", e)
+            return {}
+
+    def save_last_prices(self, last_prices: Dict[str, float]) -> bool:
+        """Save last prices"""
+        try:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM last_prices")
+            self.conn.executemany("INSERT INTO last_prices VALUES (?, ?)",
+                                  list(last_prices.items()))
+            self.conn.execute("COMMIT")
+            return True
+        except Exception as e:
+            try:
+                self.conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass  # BEGIN itself failed; no transaction to roll back
+            logger.warning("Error saving last prices: %s", e)
+            return False
+
+    def load_last_prices(self) -> Dict[str, float]:
+        """Load last prices"""
+        try:
+            rows = self.conn.execute("SELECT coin_id, price FROM last_prices")
+            return dict(rows)
+        except Exception as e:
+            logger.warning("Error loading last prices: %s", e)
+            return {}
+
+    def add_coin_to_user(self, chat_id: int, coin_id: str) -> bool:
+        """Add coin to user"""
+        try:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO user_coin_subs VALUES (?, ?)", (chat_id, coin_id))
+            return cursor.rowcount > 0
+        except Exception as e:
+            logger.warning("Error adding coin %s to user %s: %s", coin_id, chat_id, e)
+            return False
+
+    def remove_coin_from_user(self, chat_id: int, coin_id: str) -> bool:
+        """Remove coin from user"""
+        try:
+            cursor = self.conn.execute(
+                "DELETE FROM user_coin_subs WHERE chat_id = ? AND coin_id = ?",
+                (chat_id, coin_id))
+            return cursor.rowcount > 0
+        except Exception as e:
+            logger.warning("Error removing coin %s from user %s: %s", coin_id, chat_id, e)
+            return False
+
+    def clear_user_coins(self, chat_id: int) -> bool:
+        """Clear all user coins"""
+        return self.delete_user_coin_subscriptions(chat_id)
+
+    def get_user_coins(self, chat_id: int) -> List[str]:
+        """Get user coins"""
+        try:
+            rows = self.conn.execute(
+                "SELECT coin_id FROM user_coin_subs WHERE chat_id = ? ORDER BY coin_id",
+                (chat_id,))
+            return [row[0] for row in rows]
+        except Exception as e:
+            logger.warning("Error getting coins for user %s: %s", chat_id, e)
+            return []
+
+    def backup_data(self, backup_path: str = None) -> bool:
+        """Create data backup as a JSON export"""
+        if backup_path is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            backup_path = f"backup_{timestamp}.json"
+
+        try:
+            data = {
+                "subscribers": self.load_subscribers(),
+                "user_alert_thresholds": {str(k): v for k, v in self.load_user_thresholds().items()},
+                "user_coin_subscriptions": {str(k): v for k, v in self.load_user_coin_subscriptions().items()},
+                "last_prices": self.load_last_prices(),
+            }
+            with open(backup_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(data, indent=2, ensure_ascii=False))
+            return True
+        except Exception as e:
+            logger.warning("Error creating backup: %s", e)
+            return False
+
+    def restore_data(self, backup_path: str) -> bool:
+        """Restore data from a JSON backup file"""
+        try:
+            with open(backup_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            self.save_subscribers(data.get("subscribers", []))
+            for chat_id, threshold in data.get("user_alert_thresholds", {}).items():
+                self.save_user_threshold(int(chat_id), threshold)
+            for chat_id, coin_ids in data.get("user_coin_subscriptions", {}).items():
+                self.save_user_coin_subscriptions(int(chat_id), coin_ids)
+            self.save_last_prices(data.get("last_prices", {}))
+
+            return True
+        except Exception as e:
+            logger.warning("Error restoring data: %s", e)
+            return False
+
+
+class RedisStorage:
+    """Persistent storage for user data using Redis
+
+    Implements the same interface as UserStorage with O(1) Redis commands
+    (SADD/SREM/HSET) instead of full-file JSON rewrites. Persistence is
+    delegated to Redis (AOF/RDB), so the bot never fsyncs on a command.
+    Requires the optional `redis` package and a running server.
+    """
+
+    def __init__(self, redis_url: str = "redis://localhost:6379/0"):
+        """Initialize Redis storage with specified connection URL"""
+        import redis
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+
+    def save_subscribers(self, subscribers: List[int]) -> bool:
+        """Save subscribers list"""
+        try:
+            pipe = self.redis.pipeline()
+            pipe.delete("subscribers")
+            if subscribers:
+                pipe.sadd("subscribers", *subscribers)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning("Error saving subscribers: %s", e)
+            return False
+
+    def load_subscribers(self) -> List[int]:
+        """Load subscribers list"""
+        try:
+            return sorted(int(m) for m in self.redis.smembers("subscribers"))
+        except Exception as e:
+            logger.warning("Error loading subscribers: %s", e)
+            return []
+
+    def save_user_threshold(self, chat_id: int, threshold: float) -> bool:
+        """Save user alert threshold"""
+        try:
+            self.redis.hset("user_alert_thresholds", str(chat_id), threshold)
+            return True
+        except Exception as e:
+            logger.warning("Error saving threshold for user %s: %s", chat_id, e)
+            return False
+
+    def delete_user_threshold(self, chat_id: int) -> bool:
+        """Delete user alert threshold"""
+        try:
+            return self.redis.hdel("user_alert_thresholds", str(chat_id)) > 0
+        except Exception as e:
+            logger.warning("Error deleting threshold for user %s: %s", chat_id, e)
+            return False
+
+    def load_user_thresholds(self) -> Dict[int, float]:
+        """Load user alert thresholds"""
+        try:
+            return {int(k): float(v)
+                    for k, v in self.redis.hgetall("user_alert_thresholds").items()}
+        except Exception as e:
+            logger.warning("Error loading user thresholds: %s", e)
+            return {}
+
+    def save_user_coin_subscriptions(self, chat_id: int, coin_ids: List[str]) -> bool:
+        """Save user coin subscriptions"""
+        try:
+            pipe = self.redis.pipeline()
+            pipe.delete(f"user:{chat_id}:coins")
+            if coin_ids:
+                pipe.sadd(f"user:{chat_id}:coins", *coin_ids)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning("Error saving coin subscriptions for user %s: %s", chat_id, e)
+            return False
+
+    def delete_user_coin_subscriptions(self, chat_id: int) -> bool:
+        """Delete user coin subscriptions"""
+        try:
+            return self.redis.delete(f"user:{chat_id}:coins") > 0
+        except Exception as e:
+            logger.warning("Error deleting coin subscriptions for user %s: %s", chat_id, e)
+            return False
+
+    def load_user_coin_subscriptions(self) -> Dict[int, List[str]]:
+        """Load user coin subscriptions"""
+        try:
+            result = {}
+            for key in self.redis.scan_iter(match="user:*:coins"):
+                chat_id = int(key.split(":")[1])
+                result[chat_id] = sorted(self.redis.smembers(key))
+            return result
+        except Exception as e:
+            logger.warning("Error loading coin subscriptions: %s", e)
+            return {}
+
+    def save_last_prices(self, last_prices: Dict[str, float]) -> bool:
+        """Save last prices"""
+        try:
+            pipe = self.redis.pipeline()
+            pipe.delete("last_prices")
+            if last_prices:
+                pipe.hset("last_prices", mapping=last_prices)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning("Error saving last prices: %s", e)
+            return False
+
+    def load_last_prices(self) -> Dict[str, float]:
+        """Load last prices"""
+        try:
+            return {k: float(v) for k, v in self.redis.hgetall("last_prices").items()}
+        except Exception as e:
+            logger.warning("Error loading last prices: %s", e)
+            return {}
+
+    def add_coin_to_user(self, chat_id: int, coin_id: str) -> bool:
+        """Add coin to user"""
+        try:
+            return self.redis.sadd(f"user:{chat_id}:coins", coin_id) > 0
+        except Exception as e:
+            logger.warning("Error adding coin %s to user %s: %s", coin_id, chat_id, e)
+            return False
+
+    def remove_coin_from_user(self, chat_id: int, coin_id: str) -> bool:
+        """Remove coin from user"""
+        try:
+            return self.redis.srem(f"user:{chat_id}:coins", coin_id) > 0
+        except Exception as e:
+            logger.warning("Error removing coin %s from user %s: %s", coin_id, chat_id, e)
+            return False
+
+    def clear_user_coins(self, chat_id: int) -> bool:
+        """Clear all user coins"""
+        try:
+            return self.redis.delete(f"user:{chat_id}:coins") > 0
+        except Exception as e:
+            logger.warning("Error clearing coins for user %s: %s", chat_id, e)
+            return False
+
+    def get_user_coins(self, chat_id: int) -> List[str]:
+        """Get user coins"""
+        try:
+            return sorted(self.redis.smembers(f"user:{chat_id}:coins"))
+        except Exception as e:
+            logger.warning("Error getting coins for user %s: %s", chat_id, e)
+            return []
+
+    def backup_data(self, backup_path: str = None) -> bool:
+        """Create data backup (delegates snapshotting to Redis)"""
+        try:
+            self.redis.bgsave()
+            return True
+        except Exception as e:
+            logger.warning("Error creating backup: %s", e)
+            return False
+
+    def restore_data(self, backup_path: str) -> bool:
+        """Restore data from a JSON backup file"""
+        try:
+            with open(backup_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            self.save_subscribers(data.get("subscribers", []))
+            for chat_id, threshold in data.get("user_alert_thresholds", {}).items():
+                self.save_user_threshold(int(chat_id), threshold)
+            for chat_id, coin_ids in data.get("user_coin_subscriptions", {}).items():
+                self.save_user_coin_subscriptions(int(chat_id), coin_ids)
+            self.save_last_prices(data.get("last_prices", {}))
+
+            return True
+        except Exception as e:
+            logger.warning("Error restoring data: %s", e)
+            return False
+
 
 # Global storage instance
 storage = None
@@ -267,11 +959,12 @@ def get_storage() -> UserStorage:
     """Get global storage instance"""
     global storage
     if storage is None:
-        try:
-            from config import STORAGE_PATH
+        if STORAGE_BACKEND == "redis":
+            storage = RedisStorage(redis_url=REDIS_URL)
+        elif STORAGE_BACKEND == "sqlite":
+            storage = SQLiteStorage(storage_path=STORAGE_PATH)
+        else:
             storage = UserStorage(storage_path=STORAGE_PATH)
-        except ImportError:
-            storage = UserStorage(storage_path="user_data")
     return storage
 
 